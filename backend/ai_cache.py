@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de respostas da IA
+LRU + TTL em memória, com camada opcional em SQLite compartilhada entre processos
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class AIResponseCache:
+    """
+    Cache das respostas do Gemini pelo prompt final e configuração de geração.
+
+    Prompts idênticos (mesmo ``content_type``, prompt e contexto após
+    ``prepare_prompt``) não geram nova chamada à API enquanto a resposta não
+    expira. A camada em memória é LRU; a camada SQLite (opcional) sobrevive a
+    reinícios e é compartilhada pelos workers do gunicorn.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400, db_path: Optional[str] = None,
+                 max_db_entries: int = 50000, prune_every: int = 500):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Respostas mantidas em memória
+            ttl: Validade de uma resposta (s)
+            db_path: Arquivo SQLite da segunda camada (None desativa)
+            max_db_entries: Respostas mantidas no SQLite
+            prune_every: Gravações no SQLite entre duas limpezas
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self.prune_every = prune_every
+        self.db_path = db_path
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        # Memória e SQLite têm travas próprias: um acesso ao disco não bloqueia os acertos em memória
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._puts = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS ai_responses ('
+                'key TEXT PRIMARY KEY, content TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ai_responses_created ON ai_responses (created)')
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: Optional[Dict[str, Any]]) -> str:
+        """Chave da resposta: modelo, prompt final e configuração de geração"""
+        payload = json.dumps([model, prompt, generation_config], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Resposta armazenada (e ainda válida) ou None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, content = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return content
+                del self._entries[key]
+
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    'SELECT content, created FROM ai_responses WHERE key = ? AND created >= ?',
+                    (key, now - self.ttl)
+                ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self.db_hits += 1
+                    self._remember(key, row[1], row[0])
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, content: str):
+        """Armazena uma resposta bem-sucedida"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, content)
+        if self._db is None:
+            return
+
+        with self._db_lock:
+            self._db.execute('INSERT OR REPLACE INTO ai_responses VALUES (?, ?, ?)', (key, content, now))
+            self._db.commit()
+            self._puts += 1
+            prune = self._puts % self.prune_every == 0
+        if prune:
+            self._prune(now)
+
+    def _prune(self, now: float):
+        """
+        Remove do SQLite as respostas expiradas e as mais antigas acima de ``max_db_entries``.
+
+        Usa uma conexão própria, sem as travas do cache: com WAL, as leituras
+        continuam durante a limpeza. Se outra thread já estiver limpando, não faz nada.
+        """
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            db = sqlite3.connect(self.db_path, timeout=5)
+            try:
+                db.execute('DELETE FROM ai_responses WHERE created < ?', (now - self.ttl,))
+                count = db.execute('SELECT COUNT(*) FROM ai_responses').fetchone()[0]
+                if count > self.max_db_entries:
+                    # Percorre o índice de created até a última entrada a remover, sem ordenar a tabela
+                    db.execute(
+                        'DELETE FROM ai_responses WHERE created <= ('
+                        'SELECT created FROM ai_responses ORDER BY created LIMIT 1 OFFSET ?)',
+                        (count - self.max_db_entries - 1,)
+                    )
+                db.commit()
+            finally:
+                db.close()
+        finally:
+            self._prune_lock.release()
+
+    def _remember(self, key: str, created: float, content: str):
+        self._entries[key] = (created, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache"""
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+            'persistent': self._db is not None
+        }
@@ -0,0 +1,772 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provedores de IA (Gemini e local determinístico)
+Sessão HTTP com pool de conexões, retentativas com backoff, circuit breaker, cache, streaming e caminho assíncrono
+"""
+
+import json
+import time
+import uuid
+import random
+import hashlib
+import asyncio
+import logging
+import threading
+import importlib.util
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ai_cache import AIResponseCache
+
+try:
+    import httpx
+except ImportError:  # caminho assíncrono usa threads sem httpx
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 1024,
+}
+
+# Respostas que indicam sobrecarga/falha temporária do provedor
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Valor padrão de GEMINI_API_KEY em app.load_config (chave não configurada)
+PLACEHOLDER_API_KEY = 'SUA API KEY AQUI'
+
+LOCAL_WORDS = (
+    "análise modelo dados resultados método proposta avaliação sistema desempenho abordagem "
+    "experimentos estudo contexto aplicação técnica evidência processo estrutura pesquisa eficiência"
+).split()
+
+
+class QueueFullError(Exception):
+    """Fila de gerações assíncronas saturada (mapeado para HTTP 429)"""
+
+
+class AIStreamError(Exception):
+    """Falha ao gerar por streaming (``retry_after`` preenchido com o circuito aberto)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado → aberto → meio-aberto).
+
+    Após ``failure_threshold`` falhas consecutivas o circuito abre e as
+    chamadas falham imediatamente por ``reset_timeout`` segundos; depois disso
+    uma única chamada de teste é liberada e seu resultado fecha ou reabre o
+    circuito. Evita que todos os workers martelem uma API fora do ar.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def retry_after(self) -> float:
+        """Segundos até a próxima chamada de teste (0 se o circuito está fechado)"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    logger.warning("Circuit breaker da IA aberto após %d falhas", self._failures)
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def deterministic_text(prompt: str, words: int = 60) -> str:
+    """Texto determinístico para o prompt (mesmo prompt, mesma resposta)"""
+    seed = int.from_bytes(hashlib.sha256(prompt.encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(LOCAL_WORDS) for _ in range(words)).capitalize() + '.'
+
+
+class AIProvider:
+    """
+    Interface dos provedores de IA.
+
+    Implementa o cache de respostas (``generate``, ``agenerate`` e ``stream``
+    consultam o cache antes de chamar o provedor) e o cache do health check.
+    Cada provedor implementa ``_request`` (resposta completa), e pode
+    sobrescrever ``_arequest`` (padrão: ``_request`` em uma thread),
+    ``_stream`` (padrão: a resposta completa em um único trecho) e
+    ``health_check``.
+    """
+
+    name = 'base'
+    display_name = 'Base'
+
+    def __init__(self, cache: Optional[AIResponseCache] = None):
+        self.cache = cache
+        self._health: Optional[Dict[str, Any]] = None
+
+    @property
+    def model(self) -> str:
+        return self.name
+
+    @property
+    def configured(self) -> bool:
+        """Indica se o provedor tem o necessário para funcionar (ex.: chave da API)"""
+        return True
+
+    @property
+    def circuit_state(self) -> Optional[str]:
+        """Estado do circuit breaker (None se o provedor não usa)"""
+        return None
+
+    @property
+    def cache_namespace(self) -> str:
+        """Prefixo das chaves de cache (respostas de modelos diferentes não se misturam)"""
+        return f"{self.name}:{self.model}"
+
+    def _lookup(self, prompt: str, generation_config: Optional[Dict[str, Any]],
+                use_cache: bool) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Chave do cache e resposta armazenada (se houver)"""
+        if self.cache is None:
+            return None, None
+        key = self.cache.make_key(self.cache_namespace, prompt, generation_config or DEFAULT_GENERATION_CONFIG)
+        content = self.cache.get(key) if use_cache else None
+        if content is None:
+            return key, None
+        return key, {'success': True, 'content': content, 'cached': True}
+
+    def get_cached(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Resposta em cache para o prompt, sem chamar o provedor"""
+        _, cached = self._lookup(prompt, generation_config, True)
+        return cached['content'] if cached else None
+
+    def _store(self, key: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        if key is not None and result['success']:
+            self.cache.put(key, result['content'])
+        result.setdefault('cached', False)
+        return result
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Gera conteúdo para o prompt (bloqueante).
+
+        Com cache configurado, prompts idênticos são respondidos sem chamar o
+        provedor (inclusive com o circuito aberto); ``use_cache=False`` força
+        uma nova geração, que substitui a resposta armazenada.
+        """
+        key, cached = self._lookup(prompt, generation_config, use_cache)
+        if cached:
+            return cached
+        return self._store(key, self._request(prompt, generation_config))
+
+    async def agenerate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                        use_cache: bool = True) -> Dict[str, Any]:
+        """Gera conteúdo para o prompt sem bloquear o event loop"""
+        key, cached = self._lookup(prompt, generation_config, use_cache)
+        if cached:
+            return cached
+        return self._store(key, await self._arequest(prompt, generation_config))
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               use_cache: bool = True) -> Iterator[str]:
+        """
+        Gera conteúdo para o prompt, produzindo o texto à medida que chega.
+
+        Resposta em cache é produzida de uma vez; a resposta completa é
+        armazenada no cache ao final. Falhas (antes ou durante o streaming)
+        levantam ``AIStreamError``.
+        """
+        key, cached = self._lookup(prompt, generation_config, use_cache)
+        if cached:
+            yield cached['content']
+            return
+
+        parts = []
+        for text in self._stream(prompt, generation_config):
+            parts.append(text)
+            yield text
+
+        content = ''.join(parts).strip()
+        if not content:
+            raise AIStreamError('Resposta vazia da API')
+        if key is not None:
+            self.cache.put(key, content)
+
+    def _request(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def _arequest(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._request, prompt, generation_config)
+
+    def _stream(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Iterator[str]:
+        result = self._request(prompt, generation_config)
+        if not result['success']:
+            raise AIStreamError(result['error'], result.get('retry_after'))
+        yield result['content']
+
+    def health_check(self) -> Dict[str, Any]:
+        """Verifica o provedor agora: ``{'ok', 'latency_ms', 'error'?}``"""
+        return {'ok': True, 'latency_ms': 0.0}
+
+    def check_health(self, max_age: float = 30.0) -> Dict[str, Any]:
+        """Resultado do health check, refeito quando tem mais de ``max_age`` segundos"""
+        health = self._health
+        if health is None or time.time() - health['checked_at'] > max_age:
+            health = dict(self.health_check(), checked_at=time.time())
+            self._health = health
+        return health
+
+    def close(self):
+        pass
+
+
+class GeminiProvider(AIProvider):
+    """
+    Provedor Google Gemini (API ``generateContent``).
+
+    Uma única ``requests.Session`` por processo mantém as conexões abertas
+    (keep-alive) entre chamadas. Falhas temporárias (timeout, conexão, HTTP
+    429/5xx) são repetidas com backoff exponencial com jitter, respeitando
+    ``Retry-After``; falhas persistentes abrem o circuit breaker.
+
+    ``agenerate`` usa ``httpx.AsyncClient`` (HTTP/2 quando o pacote ``h2``
+    está instalado) ou, sem httpx, executa a chamada em uma thread.
+    """
+
+    name = 'gemini'
+    display_name = 'Google Gemini'
+
+    def __init__(self, api_url: str, api_key: str, timeout: float = 30.0, connect_timeout: float = 5.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 10, breaker: Optional[CircuitBreaker] = None,
+                 cache: Optional[AIResponseCache] = None):
+        """
+        Inicializa o provedor.
+
+        Args:
+            api_url: URL do endpoint ``generateContent``
+            api_key: Chave da API
+            timeout: Tempo máximo de leitura da resposta (s)
+            connect_timeout: Tempo máximo para abrir a conexão (s)
+            max_retries: Retentativas após a primeira tentativa
+            backoff_base: Espera base do backoff exponencial (s)
+            backoff_max: Espera máxima entre tentativas (s)
+            pool_size: Conexões mantidas abertas por host
+            breaker: Circuit breaker (padrão: 5 falhas, 30 s)
+            cache: Cache de respostas por prompt (None desativa)
+        """
+        super().__init__(cache)
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+        self._session: Optional[requests.Session] = None
+        self._async_clients: Dict[int, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_url(self) -> str:
+        """URL do recurso do modelo (``.../models/<modelo>``)"""
+        return self.api_url.split(':generateContent')[0]
+
+    @property
+    def model(self) -> str:
+        return self.model_url.rsplit('/', 1)[-1]
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and self.api_key != PLACEHOLDER_API_KEY
+
+    @property
+    def circuit_state(self) -> Optional[str]:
+        return self.breaker.state
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.api_url
+
+    @property
+    def session(self) -> requests.Session:
+        """Sessão HTTP compartilhada (criada no primeiro uso)"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # Retentativas são feitas por _send(), com backoff e breaker
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers['Content-Type'] = 'application/json'
+                    self._session = session
+        return self._session
+
+    def _headers(self) -> Dict[str, str]:
+        # Chave no header (e não na URL) para não aparecer em logs e mensagens de erro
+        return {'x-goog-api-key': self.api_key}
+
+    def _payload(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": generation_config or DEFAULT_GENERATION_CONFIG
+        }
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera antes da próxima tentativa (backoff exponencial com jitter total)"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _parse(status_code: int, body: Any, text: str) -> Dict[str, Any]:
+        """Converte a resposta HTTP no resultado ``{'success', 'content'|'error'}``"""
+        if status_code != 200:
+            return {'success': False, 'error': f"HTTP {status_code}: {text}"}
+        try:
+            content = body['candidates'][0]['content']['parts'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            return {'success': False, 'error': 'Resposta vazia da API'}
+        return {'success': True, 'content': content.strip()}
+
+    def _circuit_open(self) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': 'API do Gemini temporariamente indisponível (muitas falhas seguidas)',
+            'retry_after': round(self.breaker.retry_after(), 1)
+        }
+
+    def _record_outcome(self, transient: bool):
+        """
+        Atualiza o circuit breaker com o resultado final de uma chamada.
+
+        ``transient``: tentativas esgotadas (timeout, conexão, 429/5xx) ou
+        conexão interrompida. Qualquer outra resposta, mesmo um erro do
+        cliente (ex.: HTTP 400), indica que a API está no ar.
+        """
+        if transient:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _send(self, url: str, payload: Dict[str, Any], stream: bool = False,
+              params: Optional[Dict[str, str]] = None) -> Tuple[Optional[requests.Response], Optional[Dict[str, Any]]]:
+        """
+        POST com retentativas (sessão compartilhada).
+
+        Retorna ``(resposta, None)`` quando a API respondeu (mesmo com erro do
+        cliente, ex.: HTTP 400) ou ``(None, erro)`` após esgotar as tentativas
+        ou com o circuito aberto.
+        """
+        if not self.breaker.allow():
+            return None, self._circuit_open()
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.post(url, headers=self._headers(), params=params, json=payload,
+                                             timeout=(self.connect_timeout, self.timeout), stream=stream)
+            except requests.exceptions.Timeout:
+                result = {'success': False, 'error': 'Timeout na API do Gemini'}
+            except requests.exceptions.RequestException as e:
+                result = {'success': False, 'error': f'Erro de conexão: {str(e)}'}
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self._record_outcome(transient=False)
+                    return response, None
+                result = self._parse(response.status_code, None, response.text)
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.info("IA: tentativa %d falhou (%s); nova tentativa em %.2fs",
+                            attempt + 1, result['error'][:80], delay)
+                time.sleep(delay)
+
+        self._record_outcome(transient=True)
+        return None, result
+
+    def _request(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Chamada HTTP com retentativas (resposta completa)"""
+        response, error = self._send(self.api_url, self._payload(prompt, generation_config))
+        if error:
+            return error
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return self._parse(response.status_code, body, response.text)
+
+    @property
+    def stream_url(self) -> str:
+        """Endpoint ``streamGenerateContent`` do mesmo modelo"""
+        return self.api_url.replace(':generateContent', ':streamGenerateContent')
+
+    def _stream(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Iterator[str]:
+        """``streamGenerateContent`` com ``alt=sse``; só a abertura da conexão é repetida"""
+        response, error = self._send(self.stream_url, self._payload(prompt, generation_config),
+                                     stream=True, params={'alt': 'sse'})
+        if error:
+            raise AIStreamError(error['error'], error.get('retry_after'))
+        if response.status_code != 200:
+            raise AIStreamError(self._parse(response.status_code, None, response.text)['error'])
+
+        # text/event-stream sem charset seria decodificado como ISO-8859-1
+        response.encoding = 'utf-8'
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                try:
+                    event = json.loads(line[5:])
+                    text = event['candidates'][0]['content']['parts'][0]['text']
+                except (ValueError, KeyError, IndexError, TypeError):
+                    continue
+                if text:
+                    yield text
+        except requests.exceptions.RequestException as e:
+            self._record_outcome(transient=True)
+            raise AIStreamError(f'Conexão interrompida: {str(e)}')
+        finally:
+            response.close()
+
+    def _get_async_client(self):
+        """
+        ``httpx.AsyncClient`` do event loop atual.
+
+        Um cliente por loop (na prática, o da ``AIJobQueue``); os de loops já
+        encerrados são descartados, e ``close`` fecha os demais.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(id(loop))
+            if entry is not None and entry[0] is loop:
+                return entry[1]
+
+            for key in [key for key, (other, _) in self._async_clients.items() if other.is_closed()]:
+                del self._async_clients[key]
+            client = httpx.AsyncClient(
+                http2=importlib.util.find_spec('h2') is not None,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_keepalive_connections=self.pool_size),
+                headers={'Content-Type': 'application/json'}
+            )
+            self._async_clients[id(loop)] = (loop, client)
+            return client
+
+    async def _arequest(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Chamada HTTP assíncrona com retentativas (httpx; sem ele, em uma thread)"""
+        if httpx is None:
+            return await super()._arequest(prompt, generation_config)
+        if not self.breaker.allow():
+            return self._circuit_open()
+
+        client = self._get_async_client()
+        payload = self._payload(prompt, generation_config)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = await client.post(self.api_url, headers=self._headers(), json=payload)
+            except httpx.TimeoutException:
+                result = {'success': False, 'error': 'Timeout na API do Gemini'}
+            except httpx.HTTPError as e:
+                result = {'success': False, 'error': f'Erro de conexão: {str(e)}'}
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = None
+                    self._record_outcome(transient=False)
+                    return self._parse(response.status_code, body, response.text)
+                result = self._parse(response.status_code, None, response.text)
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        self._record_outcome(transient=True)
+        return result
+
+    def health_check(self) -> Dict[str, Any]:
+        """Latência de uma consulta aos metadados do modelo (não consome tokens)"""
+        if not self.configured:
+            return {'ok': False, 'latency_ms': None, 'error': 'GEMINI_API_KEY não configurada'}
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.model_url, headers=self._headers(),
+                                        timeout=(self.connect_timeout, 10))
+        except requests.exceptions.RequestException as e:
+            return {'ok': False, 'latency_ms': None, 'error': f'Erro de conexão: {str(e)}'}
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if response.status_code != 200:
+            return {'ok': False, 'latency_ms': latency_ms, 'error': f"HTTP {response.status_code}"}
+        return {'ok': True, 'latency_ms': latency_ms}
+
+    def close(self):
+        """Fecha a sessão HTTP e os clientes assíncronos (cada um no seu event loop)"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+        with self._lock:
+            clients, self._async_clients = list(self._async_clients.values()), {}
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+
+        for loop, client in clients:
+            if loop.is_closed():
+                continue
+            try:
+                if loop is current:
+                    loop.create_task(client.aclose())
+                elif loop.is_running():
+                    # Loop de outra thread (ex.: o da AIJobQueue)
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+                else:
+                    loop.run_until_complete(client.aclose())
+            except Exception as e:
+                logger.debug("Falha ao fechar cliente HTTP assíncrono: %s", e)
+
+
+class LocalProvider(AIProvider):
+    """
+    Provedor local determinístico (sem rede e sem chave).
+
+    Responde com texto derivado do prompt, com latência opcional; útil para
+    desenvolver o frontend e para testes de carga sem consumir a cota.
+    """
+
+    name = 'local'
+    display_name = 'Local (determinístico)'
+
+    def __init__(self, latency: float = 0.0, words: int = 60, cache: Optional[AIResponseCache] = None):
+        super().__init__(cache)
+        self.latency = latency
+        self.words = words
+
+    def _request(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return {'success': True, 'content': deterministic_text(prompt, self.words)}
+
+    async def _arequest(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return {'success': True, 'content': deterministic_text(prompt, self.words)}
+
+    def _stream(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Iterator[str]:
+        time.sleep(self.latency)
+        words = deterministic_text(prompt, self.words).split(' ')
+        for i in range(0, len(words), 4):
+            yield ' '.join(words[i:i + 4]) + (' ' if i + 4 < len(words) else '')
+
+
+PROVIDERS = {provider.name: provider for provider in (GeminiProvider, LocalProvider)}
+
+
+def create_provider(name: str, config: Dict[str, Any], cache: Optional[AIResponseCache] = None) -> AIProvider:
+    """Cria o provedor ``name`` (``AI_PROVIDER``) a partir da configuração do app"""
+    if name == 'gemini':
+        return GeminiProvider(
+            config['GEMINI_API_URL'],
+            config['GEMINI_API_KEY'],
+            timeout=config['AI_TIMEOUT'],
+            max_retries=config['AI_MAX_RETRIES'],
+            pool_size=config['AI_POOL_SIZE'],
+            breaker=CircuitBreaker(config['AI_BREAKER_THRESHOLD'], config['AI_BREAKER_RESET']),
+            cache=cache
+        )
+    if name == 'local':
+        return LocalProvider(latency=config['AI_LOCAL_LATENCY_MS'] / 1000, cache=cache)
+    raise ValueError(f"Provedor de IA desconhecido: {name} (opções: {', '.join(PROVIDERS)})")
+
+
+class AIJobQueue:
+    """
+    Gerações de IA em segundo plano, sem ocupar as threads do servidor.
+
+    Um único event loop (em uma thread própria) mantém até ``max_in_flight``
+    chamadas simultâneas via ``AIProvider.agenerate``; ``submit`` retorna
+    um id de job imediatamente e o resultado é consultado com ``get_status``.
+    """
+
+    def __init__(self, provider: AIProvider, max_in_flight: int = 32, max_pending: int = 256,
+                 job_ttl: int = 600):
+        self.provider = provider
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Inicia o event loop em segundo plano sob demanda (no primeiro job)"""
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='ai-jobs', daemon=True).start()
+            self._loop = loop
+        return self._loop
+
+    async def _run(self, prompt: str, generation_config: Optional[Dict[str, Any]],
+                   use_cache: bool) -> Dict[str, Any]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            return await self.provider.agenerate(prompt, generation_config, use_cache)
+
+    async def _run_many(self, prompts: List[str], use_cache: bool, fan_out: int) -> List[Any]:
+        limit = asyncio.Semaphore(fan_out)
+
+        async def run_one(prompt: str) -> Dict[str, Any]:
+            async with limit:
+                return await self._run(prompt, None, use_cache)
+
+        return await asyncio.gather(*(run_one(prompt) for prompt in prompts), return_exceptions=True)
+
+    def generate_many(self, prompts: List[str], use_cache: bool = True, fan_out: int = 4,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Gera vários prompts em paralelo e aguarda todos (ordem de entrada).
+
+        No máximo ``fan_out`` chamadas deste lote ficam em andamento ao mesmo
+        tempo (além do limite global ``max_in_flight``); prompts repetidos são
+        enviados uma única vez. Levanta ``concurrent.futures.TimeoutError`` se
+        o lote não terminar a tempo.
+        """
+        unique = list(dict.fromkeys(prompts))
+        with self._lock:
+            loop = self._get_loop()
+        future = asyncio.run_coroutine_threadsafe(self._run_many(unique, use_cache, fan_out), loop)
+        try:
+            results = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+        by_prompt = {
+            prompt: {'success': False, 'error': f'Erro inesperado: {str(result)}'}
+            if isinstance(result, BaseException) else result
+            for prompt, result in zip(unique, results)
+        }
+        return [dict(by_prompt[prompt]) for prompt in prompts]
+
+    def pending_count(self) -> int:
+        """Número de gerações na fila ou em andamento"""
+        return sum(1 for job in self._jobs.values() if not job['future'].done())
+
+    def submit(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               use_cache: bool = True, on_done: Optional[Callable[[], None]] = None, **metadata) -> str:
+        """Enfileira uma geração e retorna o id do job (``on_done`` é chamado ao final)"""
+        with self._lock:
+            self._prune()
+
+            if self.pending_count() >= self.max_pending:
+                raise QueueFullError(f'Fila de IA cheia ({self.max_pending} gerações pendentes)')
+
+            job_id = uuid.uuid4().hex[:12]
+            future = asyncio.run_coroutine_threadsafe(
+                self._run(prompt, generation_config, use_cache), self._get_loop()
+            )
+            self._jobs[job_id] = {
+                'future': future,
+                'metadata': metadata,
+                'submitted_at': time.time(),
+                'finished_at': None
+            }
+            future.add_done_callback(lambda f, job_id=job_id: self._mark_finished(job_id))
+            if on_done:
+                future.add_done_callback(lambda f: on_done())
+
+        return job_id
+
+    def _mark_finished(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job:
+            job['finished_at'] = time.time()
+
+    def _prune(self):
+        """Esquece jobs concluídos há mais de ``job_ttl`` segundos"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] and now - job['finished_at'] > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o status de um job ou None se ele não existir"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        future: Future = job['future']
+        status = {'job_id': job_id, 'submitted_at': job['submitted_at'], **job['metadata']}
+        if not future.done():
+            status['status'] = 'running'
+            return status
+
+        status['finished_at'] = job['finished_at']
+        error = future.exception()
+        result = {'success': False, 'error': f'Erro inesperado: {str(error)}'} if error else future.result()
+        status['status'] = 'completed' if result['success'] else 'failed'
+        status.update(result)
+        return status
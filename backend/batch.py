@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geração de artigos em lote
+Compila muitos documentos em paralelo (pool próprio ou o da fila de compilação) e gera manifesto + zip
+
+Uso (a partir de backend/):
+    python batch.py anais.jsonl -o anais.zip --jobs 8
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import zipfile
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from build_cache import BuildCache
+from compile_jobs import compile_document
+
+
+def load_documents(text: str) -> List[Dict[str, Any]]:
+    """
+    Lê os payloads de um lote.
+
+    Aceita uma lista JSON, um objeto ``{"documents": [...]}`` ou JSONL (um
+    documento por linha). Cada documento tem o mesmo formato aceito por
+    ``/api/generate`` e, opcionalmente, ``name`` (nome dos arquivos no zip).
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        data = data.get('documents', [data])
+    if not isinstance(data, list) or not all(isinstance(doc, dict) for doc in data):
+        raise ValueError("O lote deve ser uma lista de documentos (objetos JSON)")
+    return data
+
+
+def _document_name(index: int, data: Dict[str, Any], used: set) -> str:
+    """Nome do documento no zip: ``name`` sanitizado ou ``document_<n>``, sem repetições"""
+    base = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(data.get('name') or '')).strip('._')
+    base = base or f"document_{index + 1:04d}"
+    name, suffix = base, 2
+    while name in used:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    used.add(name)
+    return name
+
+
+def build_document(index: int, data: Dict[str, Any], output_dir: str, build_cache: BuildCache,
+                   output_name: str, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compila um documento do lote, medindo o tempo.
+
+    Executado nos processos do pool; exceções viram falhas do documento e
+    nunca interrompem o lote.
+    """
+    started = time.perf_counter()
+    try:
+        result = compile_document(data, output_dir, build_cache, output_name, cache_dir)
+    except Exception as e:
+        result = {'success': False, 'cached': False, 'passes': 0, 'message': f"Erro inesperado: {str(e)}"}
+    result.pop('latex_code', None)
+    result['index'] = index
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(documents: List[Dict[str, Any]], output_dir: str, build_cache: BuildCache,
+              max_workers: Optional[int] = None, batch_id: Optional[str] = None,
+              executor: Optional[Executor] = None, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compila todos os documentos em paralelo.
+
+    No máximo ``max_workers`` documentos ficam em andamento ao mesmo tempo:
+    os seguintes só são enviados ao pool quando um termina. Com um
+    ``executor`` compartilhado (o da fila de compilação do servidor), jobs de
+    ``/api/generate`` enviados durante o lote esperam no máximo um documento.
+
+    Args:
+        documents: Payloads (ver ``load_documents``)
+        output_dir: Diretório onde os PDFs/.tex são gravados
+        build_cache: Cache de builds (documentos repetidos não são recompilados)
+        max_workers: Documentos em paralelo (padrão: todos os núcleos)
+        batch_id: Identificador usado no nome dos arquivos gerados
+        executor: Pool de processos compartilhado; sem ele, um pool próprio
+            com ``max_workers`` processos é criado e encerrado aqui
+        cache_dir: Diretório de formatos, derivados de figuras e builds temporários
+
+    Returns:
+        Manifesto com o resultado de cada documento (na ordem de entrada),
+        contagens de sucesso/falha, processos realmente usados e tempo total.
+    """
+    batch_id = batch_id or uuid.uuid4().hex[:12]
+    workers = min(max_workers or os.cpu_count() or 1, len(documents))
+    started = time.perf_counter()
+
+    used_names: set = set()
+    names = [_document_name(i, data, used_names) for i, data in enumerate(documents)]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+
+    if documents:
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=workers) as own_executor:
+                _compile_all(own_executor, workers, documents, str(output_dir), build_cache, cache_dir,
+                             batch_id, results)
+        else:
+            _compile_all(executor, workers, documents, str(output_dir), build_cache, cache_dir,
+                         batch_id, results)
+
+    for name, result in zip(names, results):
+        result['name'] = name
+
+    succeeded = sum(1 for result in results if result['success'])
+    return {
+        'batch_id': batch_id,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'workers': workers,
+        'seconds': round(time.perf_counter() - started, 3),
+        'documents': results
+    }
+
+
+def _compile_all(executor: Executor, limit: int, documents: List[Dict[str, Any]], output_dir: str,
+                 build_cache: BuildCache, cache_dir: Optional[str], batch_id: str,
+                 results: List[Optional[Dict[str, Any]]]):
+    """Envia os documentos ao pool mantendo no máximo ``limit`` em andamento"""
+    remaining = iter(enumerate(documents))
+    running = {}
+
+    def submit_next():
+        for i, data in remaining:
+            future = executor.submit(build_document, i, data, output_dir, build_cache,
+                                     f"batch_{batch_id}_{i:04d}", cache_dir)
+            running[future] = i
+            return
+
+    for _ in range(limit):
+        submit_next()
+
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = running.pop(future)
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # Ex.: processo worker encerrado abruptamente
+                results[i] = {'index': i, 'success': False, 'cached': False, 'passes': 0,
+                              'seconds': 0.0, 'message': f"Erro no worker: {str(e)}"}
+            submit_next()
+
+
+def write_zip(manifest: Dict[str, Any], output_dir: str, zip_path: str) -> Path:
+    """
+    Empacota os arquivos gerados e o ``manifest.json``.
+
+    Cada documento bem-sucedido entra como ``<name>.pdf`` e ``<name>.tex``.
+    PDFs já são comprimidos, então são armazenados sem recompressão.
+    """
+    output_dir = Path(output_dir)
+    zip_path = Path(zip_path)
+
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for result in manifest['documents']:
+            if not result['success']:
+                continue
+            archive.write(output_dir / result['pdf_filename'], f"{result['name']}.pdf",
+                          compress_type=zipfile.ZIP_STORED)
+            archive.write(output_dir / result['latex_filename'], f"{result['name']}.tex")
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    return zip_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('input', help="Arquivo .json/.jsonl com os documentos ('-' para stdin)")
+    parser.add_argument('-o', '--output', default='batch.zip', help="Zip de saída")
+    parser.add_argument('--jobs', type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    parser.add_argument('--output-dir', default='output', help="Diretório dos PDFs/.tex")
+    parser.add_argument('--cache-dir', default='cache', help="Diretório do cache (builds, formatos, figuras)")
+    args = parser.parse_args()
+
+    text = sys.stdin.read() if args.input == '-' else Path(args.input).read_text(encoding='utf-8')
+    documents = load_documents(text)
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    build_cache = BuildCache(args.cache_dir)
+    manifest = run_batch(documents, args.output_dir, build_cache, max_workers=args.jobs,
+                         cache_dir=args.cache_dir)
+    write_zip(manifest, args.output_dir, args.output)
+
+    for result in manifest['documents']:
+        status = 'cache' if result.get('cached') else ('ok' if result['success'] else 'FALHA')
+        line = f"{result['name']:<40} {status:>6} {result['seconds']:>8.2f}s"
+        print(line if result['success'] else f"{line}  {result['message']}")
+    print(f"{manifest['succeeded']}/{manifest['total']} documentos em {manifest['seconds']:.2f}s "
+          f"({manifest['workers']} processos) -> {args.output}")
+
+    return 0 if manifest['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: latência p50/p95/p99 de /api/ai/generate sob concorrência
+Roda o servidor e o stub do Gemini no mesmo processo (sem rede externa nem cota), ou mede um servidor já no ar
+
+Uso (a partir de backend/):
+    python benchmarks/bench_ai.py --concurrency 1 8 32 --duration 10 --latency-ms 800
+    python benchmarks/bench_ai.py --url http://localhost:5000 --concurrency 16   # servidor apontado para o stub
+
+Cada requisição usa um prompt diferente (sem acertos no cache de respostas);
+``--repeat-prompts`` mede o caminho com cache.
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import statistics
+import http.client
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from load_test import percentile
+
+
+def start_local_server(latency_ms: float, error_rate: float) -> str:
+    """Sobe o stub do Gemini e o app (werkzeug, com threads) em segundo plano; retorna a URL do app"""
+    from werkzeug.serving import make_server
+    from gemini_stub import StubServer
+    from app import create_app
+
+    stub = StubServer(('127.0.0.1', 0), latency=latency_ms / 1000, error_rate=error_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    app = create_app({
+        'GEMINI_API_URL': f"http://127.0.0.1:{stub.server_port}/v1beta/models/stub:generateContent",
+        'GEMINI_API_KEY': 'stub',
+        'AI_PROVIDER': 'gemini',
+        'AI_CACHE_DB': '',
+        'LATEX_PREWARM': False,
+        'RATE_LIMIT_ENABLED': False,  # todos os clientes do benchmark têm o mesmo IP
+    })
+    # werkzeug registraria cada requisição em INFO
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def client(url, deadline, repeat_prompts, results, lock):
+    """Envia requisições em sequência por uma conexão keep-alive até o prazo"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+    latencies, statuses = [], Counter()
+    sequence = 0
+
+    while time.perf_counter() < deadline:
+        sequence += 1
+        prompt = 'benchmark' if repeat_prompts else f"benchmark {threading.get_ident()} {sequence}"
+        body = json.dumps({'prompt': prompt, 'content_type': 'keywords', 'context': {'title': 'Benchmark'}})
+
+        started = time.perf_counter()
+        try:
+            conn.request('POST', '/api/ai/generate', body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+            status = 'erro'
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+
+    conn.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        results['statuses'].update(statuses)
+
+
+def run(url, concurrency, duration, repeat_prompts):
+    """Executa uma rodada e retorna as métricas"""
+    results = {'latencies': [], 'statuses': Counter()}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(url, deadline, repeat_prompts, results, lock))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(results['latencies'])
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'statuses': dict(results['statuses']),
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def health(url):
+    """Resultado de /api/ai/status (health check do provedor)"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    conn.request('GET', '/api/ai/status')
+    status = json.loads(conn.getresponse().read())
+    conn.close()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default=None, help="Servidor já no ar (padrão: app + stub neste processo)")
+    parser.add_argument('--concurrency', '-c', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help="Duração de cada rodada (s)")
+    parser.add_argument('--latency-ms', type=float, default=500, help="Latência do stub (modo local)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de HTTP 503 do stub (modo local)")
+    parser.add_argument('--repeat-prompts', action='store_true', help="Mesmo prompt sempre (mede o cache)")
+    parser.add_argument('--json', action='store_true', help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    url = args.url or start_local_server(args.latency_ms, args.error_rate)
+    status = health(url)
+    reports = [run(url, concurrency, args.duration, args.repeat_prompts) for concurrency in args.concurrency]
+
+    if args.json:
+        print(json.dumps({'status': status, 'runs': reports}, indent=2))
+        return 0
+
+    check = status.get('health') or {}
+    print(f"{url} - provedor {status.get('provider')} ({status.get('version')}), "
+          f"health check {check.get('latency_ms')} ms, {args.duration:.0f}s por rodada\n")
+    print(f"{'clientes':>8} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for report in reports:
+        statuses = ', '.join(f"{code}: {count}" for code, count in sorted(report['statuses'].items(), key=str))
+        print(f"{report['concurrency']:>8} {report['requests']:>7} {report['rps']:>8.1f} {report['p50_ms']:>8.1f} "
+              f"{report['p95_ms']:>8.1f} {report['p99_ms']:>8.1f}  {statuses}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: partes do documento como dicts (versão anterior) vs. registros com __slots__ (LatexGeneratorV2)
+
+Uso (a partir de backend/):
+    python benchmarks/bench_document_parts.py --sections 1000 10000
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from latex_generator_v2 import LatexGeneratorV2
+
+
+class BaselineSections:
+    """
+    Seções como no gerador anterior aos registros de ``document_parts``.
+
+    ``add_section`` e ``_format_sections`` reproduzem o código anterior:
+    um dict por seção e ``.get()`` a cada formatação.
+    """
+
+    def __init__(self):
+        self.sections = []
+
+    @classmethod
+    def from_payload(cls, data):
+        baseline = cls()
+        for section in data.get('sections', []):
+            title = section.get('title', '').strip()
+            content = section.get('content', '').strip()
+            if title and content:
+                baseline.add_section(title, content, section.get('level', 1))
+        return baseline
+
+    def add_section(self, title, content, level=1):
+        self.sections.append({'title': title, 'content': content, 'level': level})
+
+    def _format_sections(self):
+        if not self.sections:
+            return ""
+
+        sections_latex = []
+        for section in self.sections:
+            if not section.get('title') or not section.get('content'):
+                continue
+
+            title = section['title'].strip()
+            content = section['content'].strip()
+            level = section.get('level', 1)
+
+            if level == 1:
+                section_cmd = "\\section"
+            elif level == 2:
+                section_cmd = "\\subsection"
+            elif level == 3:
+                section_cmd = "\\subsubsection"
+            else:
+                section_cmd = "\\paragraph"
+
+            sections_latex.append(f"{section_cmd}{{{title}}}\n{content}\n")
+
+        return "\n".join(sections_latex)
+
+
+def measure_memory(build, payload) -> int:
+    """Bytes mantidos pelas seções montadas a partir de ``payload``"""
+    tracemalloc.start()
+    document = build(payload)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del document
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # Textos compartilhados: mede apenas o custo do contêiner de cada parte
+    title, content = "Seção", "Lorem ipsum dolor sit amet."
+
+    print(f"{'seções':>8} {'dict (KB)':>10} {'slots (KB)':>11} {'dict fmt (ms)':>14} {'slots fmt (ms)':>15}")
+    for count in args.sections:
+        payload = {
+            'title': 'Benchmark',
+            'sections': [{'title': title, 'content': content, 'level': 1 + i % 3} for i in range(count)]
+        }
+
+        baseline_mem = measure_memory(BaselineSections.from_payload, payload)
+        current_mem = measure_memory(LatexGeneratorV2.from_payload, payload)
+
+        baseline = BaselineSections.from_payload(payload)
+        generator = LatexGeneratorV2.from_payload(payload)
+        assert baseline._format_sections() == generator._format_sections()
+
+        baseline_time = min(timeit.repeat(baseline._format_sections, number=args.repeat, repeat=3))
+        current_time = min(timeit.repeat(generator._format_sections, number=args.repeat, repeat=3))
+
+        print(f"{count:>8} {baseline_mem / 1024:>10.1f} {current_mem / 1024:>11.1f} "
+              f"{baseline_time / args.repeat * 1000:>14.3f} {current_time / args.repeat * 1000:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
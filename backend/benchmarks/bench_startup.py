@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tempo de inicialização do servidor (import de app.py + create_app)
+
+Uso (a partir de backend/):
+    python benchmarks/bench_startup.py --repeat 10 --max-ms 400
+
+Cada medição roda em um processo novo (sem módulos em cache na memória).
+Sai com código 1 se a mediana passar de ``--max-ms`` ou se algum módulo de
+``--forbid`` for importado na inicialização, para acompanhar regressões.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Subsistemas que devem ser carregados apenas no primeiro uso
+DEFAULT_FORBIDDEN = ['requests', 'PIL', 'compile_jobs', 'batch', 'latex_generator_v2', 'concurrent.futures.process']
+
+PROBE = "import sys, app; print(','.join(sorted(sys.modules)))"
+
+
+def run_once(env):
+    """Tempo (s) de um processo que importa o app, e os módulos carregados"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, set(result.stdout.strip().split(','))
+
+
+def slowest_imports(env, top):
+    """Módulos com maior tempo de import acumulado (python -X importtime)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:   self [us] | cumulative | nome"
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        entries.append((int(cumulative_us), name.rstrip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def baseline(env):
+    """Tempo de um interpretador vazio (descontado das medições)"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=env, check=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help="Quantos imports mais lentos listar")
+    parser.add_argument('--max-ms', type=float, default=None, help="Limite para a mediana (ms)")
+    parser.add_argument('--forbid', nargs='*', default=DEFAULT_FORBIDDEN,
+                        help="Módulos que não podem ser importados na inicialização")
+    args = parser.parse_args()
+
+    # Sem pré-compilação de formatos: mede apenas o caminho de inicialização
+    env = dict(os.environ, LATEX_PREWARM='0', LOG_LEVEL='WARNING')
+
+    interpreter = statistics.median(baseline(env) for _ in range(3))
+    timings, modules = [], set()
+    for _ in range(args.repeat):
+        elapsed, modules = run_once(env)
+        timings.append(elapsed - interpreter)
+
+    median_ms = statistics.median(timings) * 1000
+    print(f"Inicialização (descontado o interpretador, {interpreter * 1000:.0f} ms): "
+          f"mediana {median_ms:.1f} ms, mín {min(timings) * 1000:.1f} ms, máx {max(timings) * 1000:.1f} ms")
+
+    print(f"\n{'acumulado (ms)':>15}  módulo")
+    for cumulative_us, name in slowest_imports(env, args.top):
+        print(f"{cumulative_us / 1000:>15.1f}  {name}")
+
+    failed = False
+    loaded = sorted(name for name in args.forbid if name in modules)
+    if loaded:
+        print(f"\nFALHA: importados na inicialização: {', '.join(loaded)}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"\nFALHA: mediana {median_ms:.1f} ms acima do limite de {args.max_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: renderização do template em uma passada vs. str.replace encadeado
+
+Uso (a partir de backend/):
+    python benchmarks/bench_template_render.py --sections 100 500 --repeat 50
+"""
+
+import argparse
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from latex_generator_v2 import LatexGeneratorV2
+
+
+def legacy_generate_latex(generator: LatexGeneratorV2) -> str:
+    """Implementação anterior: cinco str.replace sobre o documento inteiro"""
+    template = generator.templates[generator.template_type]
+    latex_code = template.replace('{{TITLE}}', generator.document_data.get('title', ''))
+    latex_code = latex_code.replace('{{ABSTRACT}}', generator.document_data.get('abstract', ''))
+    latex_code = latex_code.replace('{{KEYWORDS}}', generator.document_data.get('keywords', ''))
+    latex_code = latex_code.replace('{{AUTHORS}}', generator._format_authors())
+    latex_code = latex_code.replace('{{SECTIONS}}', generator._format_sections())
+    latex_code = latex_code.replace('{{FIGURES}}', generator._format_figures())
+    latex_code = latex_code.replace('{{REFERENCES}}', generator._format_references())
+    return latex_code
+
+
+def build_generator(sections: int, work_dir: str) -> LatexGeneratorV2:
+    """Documento sintético com ``sections`` seções de ~2 KB"""
+    generator = LatexGeneratorV2(output_dir=work_dir, cache_dir=work_dir)
+    generator.set_document_info("Benchmark", "Resumo " * 100, "latex, benchmark")
+    for i in range(5):
+        generator.add_author(f"Autor {i}", "Universidade", f"autor{i}@example.org")
+    for i in range(sections):
+        generator.add_section(f"Seção {i}", "Lorem ipsum dolor sit amet. " * 70, 1 + i % 3)
+    for i in range(sections // 2):
+        generator.add_reference(f"Autor {i}", f"Título {i}", "Journal", "2024")
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'seções':>8} {'tamanho':>10} {'replace (ms)':>14} {'1 passada (ms)':>16} {'ganho':>7}")
+        for sections in args.sections:
+            generator = build_generator(sections, work_dir)
+            assert legacy_generate_latex(generator) == generator.generate_latex()
+
+            legacy = min(timeit.repeat(lambda: legacy_generate_latex(generator), number=args.repeat, repeat=3))
+            compiled = min(timeit.repeat(generator.generate_latex, number=args.repeat, repeat=3))
+            size = len(generator.generate_latex())
+
+            print(f"{sections:>8} {size:>10} {legacy / args.repeat * 1000:>14.3f} "
+                  f"{compiled / args.repeat * 1000:>16.3f} {legacy / compiled:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
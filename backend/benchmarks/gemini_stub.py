@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita a API do Gemini (generateContent e streamGenerateContent)
+Respostas determinísticas (derivadas do prompt), com latência configurável, para testes sem a API real
+
+Uso (a partir de backend/):
+    python benchmarks/gemini_stub.py --port 8081 --latency-ms 300 --token-delay-ms 20
+    GEMINI_API_URL=http://127.0.0.1:8081/v1beta/models/stub:generateContent python app.py
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+# Mesmo texto determinístico do provedor local (AI_PROVIDER=local)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_client import deterministic_text
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GeminiStub/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        """Metadados do modelo (health check) ou, em /stats, as chamadas recebidas"""
+        path = urlsplit(self.path).path
+        if path == '/stats':
+            self._send_json(200, self.server.get_stats())
+            return
+        time.sleep(self.server.latency / 10)
+        self._send_json(200, {'name': path.split('/v1beta/', 1)[-1], 'displayName': 'Gemini Stub'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            prompt = request['contents'][0]['parts'][0]['text']
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send_json(400, {'error': {'code': 400, 'message': 'Invalid request'}})
+            return
+
+        self.server.record_call()
+        if self.server.should_fail():
+            self._send_json(503, {'error': {'code': 503, 'message': 'Stub overloaded'}}, {'Retry-After': '1'})
+            return
+
+        time.sleep(self.server.latency)
+        max_tokens = request.get('generationConfig', {}).get('maxOutputTokens', 1024)
+        text = deterministic_text(prompt, min(self.server.words, max_tokens))
+
+        if url.path.endswith(':streamGenerateContent'):
+            self._stream(text, sse=parse_qs(url.query).get('alt') == ['sse'])
+        else:
+            self._send_json(200, {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]})
+
+    def _stream(self, text: str, sse: bool):
+        """Envia o texto em pedaços de poucas palavras (SSE ou array JSON, como a API real)"""
+        words = text.split(' ')
+        chunks = [' '.join(words[i:i + 4]) + (' ' if i + 4 < len(words) else '') for i in range(0, len(words), 4)]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, chunk in enumerate(chunks):
+            event = json.dumps({'candidates': [{'content': {'parts': [{'text': chunk}], 'role': 'model'}}]},
+                               ensure_ascii=False)
+            data = f"data: {event}\r\n\r\n" if sse else ('[' if i == 0 else ',') + event
+            if not sse and i == len(chunks) - 1:
+                data += ']'
+            self._write_chunk(data.encode('utf-8'))
+            time.sleep(self.server.token_delay)
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, token_delay: float = 0.0, words: int = 60,
+                 error_rate: float = 0.0, seed: int = 0, verbose: bool = False):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.words = words
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            self.failures += failed
+            return failed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'failures': self.failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=200, help="Tempo até o primeiro byte")
+    parser.add_argument('--token-delay-ms', type=float, default=20, help="Intervalo entre pedaços no streaming")
+    parser.add_argument('--words', type=int, default=60, help="Palavras por resposta")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas HTTP 503")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), latency=args.latency_ms / 1000,
+                        token_delay=args.token_delay_ms / 1000, words=args.words,
+                        error_rate=args.error_rate, verbose=args.verbose)
+    print(f"Stub do Gemini em http://{args.host}:{args.port}/v1beta/models/stub:generateContent", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
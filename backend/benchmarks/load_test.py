@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga: requisições/segundo de /api/preview e /api/generate
+Dispara requisições concorrentes contra um servidor em execução e mede vazão e latência
+
+Uso (com o servidor no ar, ex.: gunicorn -c gunicorn.conf.py main:app):
+    python benchmarks/load_test.py --url http://localhost:5000 --duration 20 --concurrency 16
+    python benchmarks/load_test.py --endpoint generate --concurrency 4 --unique
+
+Com ``--unique`` cada requisição muda o título do documento, evitando o cache
+de builds (mede a compilação de fato); sem ele, mede o caminho com cache.
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import http.client
+from collections import Counter
+from urllib.parse import urlsplit
+
+PAYLOAD = {
+    'title': 'Teste de Carga',
+    'template': 'basic',
+    'authors': [{'name': 'Autor', 'affiliation': 'Universidade', 'email': 'autor@example.com'}],
+    'abstract': 'Resumo do artigo de teste de carga.',
+    'keywords': 'latex, desempenho',
+    'sections': [
+        {'title': f'Seção {i}', 'content': 'Conteúdo da seção. ' * 40} for i in range(1, 6)
+    ],
+    'references': [{'type': 'article', 'title': 'Referência', 'authors': 'Autor, A.', 'year': '2024'}],
+}
+
+ENDPOINTS = {
+    'preview': '/api/preview',
+    'generate': '/api/generate',
+}
+
+
+def percentile(values, pct):
+    """Percentil por vizinho mais próximo (valores ordenados)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def worker(url, path, deadline, unique, results, lock):
+    """Envia requisições em sequência por uma conexão keep-alive até o prazo"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=300)
+    latencies, statuses = [], Counter()
+    sequence = 0
+
+    while time.perf_counter() < deadline:
+        payload = dict(PAYLOAD)
+        if unique:
+            sequence += 1
+            payload['title'] = f"{PAYLOAD['title']} {threading.get_ident()}-{sequence}"
+        body = json.dumps(payload)
+
+        started = time.perf_counter()
+        try:
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=300)
+            status = 'erro'
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+
+    conn.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        results['statuses'].update(statuses)
+
+
+def run(url, endpoint, concurrency, duration, unique):
+    """Executa o teste de um endpoint e retorna as métricas"""
+    results = {'latencies': [], 'statuses': Counter()}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(url, ENDPOINTS[endpoint], deadline, unique, results, lock))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(results['latencies'])
+    ok = results['statuses'].get(200, 0)
+    return {
+        'endpoint': endpoint,
+        'requests': len(latencies),
+        'ok': ok,
+        'statuses': dict(results['statuses']),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'ok_rps': ok / elapsed if elapsed else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--endpoint', choices=['preview', 'generate', 'all'], default='all')
+    parser.add_argument('--concurrency', '-c', type=int, default=8, help="Clientes simultâneos")
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help="Duração de cada teste (s)")
+    parser.add_argument('--unique', action='store_true', help="Documento diferente a cada requisição (sem cache)")
+    parser.add_argument('--json', action='store_true', help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    endpoints = list(ENDPOINTS) if args.endpoint == 'all' else [args.endpoint]
+    reports = [run(args.url, endpoint, args.concurrency, args.duration, args.unique) for endpoint in endpoints]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+
+    print(f"{args.url} - {args.concurrency} clientes, {args.duration:.0f}s por endpoint"
+          f"{' (documentos únicos)' if args.unique else ''}\n")
+    print(f"{'endpoint':<10} {'reqs':>7} {'req/s':>8} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for report in reports:
+        statuses = ', '.join(f"{status}: {count}" for status, count in sorted(report['statuses'].items(), key=str))
+        print(f"{report['endpoint']:<10} {report['requests']:>7} {report['rps']:>8.1f} {report['ok_rps']:>8.1f} "
+              f"{report['p50_ms']:>8.1f} {report['p95_ms']:>8.1f} {report['p99_ms']:>8.1f}  {statuses}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de compilação endereçado por conteúdo
+Armazena PDF/.tex já compilados, indexados pelo hash do documento
+"""
+
+import os
+import shutil
+import time
+import uuid
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from figure_store import link_file
+
+
+class BuildCache:
+    """
+    Cache de builds do LaTeX Generator.
+
+    Cada entrada fica em ``<cache_dir>/builds/<chave>/`` com os arquivos
+    ``document.pdf`` e ``document.tex``. A chave é calculada pelo gerador
+    (ver ``LatexGeneratorV2.get_build_key``) a partir do código LaTeX, do
+    template e do conteúdo das figuras referenciadas.
+    """
+
+    FILES = {'pdf': 'document.pdf', 'latex': 'document.tex'}
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 512 * 1024 * 1024,
+                 max_age_seconds: int = 24 * 3600):
+        """
+        Inicializa o cache.
+
+        Args:
+            cache_dir: Diretório base do cache
+            max_size_bytes: Tamanho máximo ocupado pelas entradas
+            max_age_seconds: Idade máxima de uma entrada sem uso
+        """
+        self.builds_dir = Path(cache_dir) / "builds"
+        self.builds_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # O lock não é picklable; cada processo worker recria o seu
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Path]]:
+        """Retorna os arquivos da entrada ou None se não estiver no cache"""
+        entry_dir = self.builds_dir / key
+        files = {kind: entry_dir / name for kind, name in self.FILES.items()}
+
+        if not all(path.exists() for path in files.values()):
+            return None
+
+        if time.time() - entry_dir.stat().st_mtime > self.max_age_seconds:
+            self._remove(entry_dir)
+            return None
+
+        # Marcar entrada como usada recentemente (base da evicção LRU)
+        try:
+            os.utime(entry_dir, None)
+        except OSError:
+            pass
+
+        return files
+
+    def put(self, key: str, files: Dict[str, Path]) -> Dict[str, Path]:
+        """
+        Armazena os arquivos gerados de um build.
+
+        A entrada é montada em um diretório temporário e publicada com
+        ``rename`` para que leitores concorrentes nunca vejam uma entrada
+        incompleta.
+        """
+        entry_dir = self.builds_dir / key
+        tmp_dir = self.builds_dir / f".tmp_{key}_{uuid.uuid4().hex[:8]}"
+        tmp_dir.mkdir()
+
+        try:
+            # Hardlink quando possível: os arquivos publicados nunca são reescritos no lugar
+            for kind, name in self.FILES.items():
+                link_file(files[kind], tmp_dir / name, allow_symlink=False)
+
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # Outra requisição publicou a mesma entrada antes
+                self._remove(tmp_dir)
+        except Exception:
+            self._remove(tmp_dir)
+            raise
+
+        self.evict()
+        return {kind: entry_dir / name for kind, name in self.FILES.items()}
+
+    def evict(self):
+        """Remove entradas expiradas e, se preciso, as menos usadas até caber no limite"""
+        with self._lock:
+            now = time.time()
+            entries = []
+
+            for entry_dir in self.builds_dir.iterdir():
+                if not entry_dir.is_dir() or entry_dir.name.startswith('.'):
+                    continue
+                try:
+                    mtime = entry_dir.stat().st_mtime
+                    size = sum(f.stat().st_size for f in entry_dir.iterdir())
+                except OSError:
+                    continue
+
+                if now - mtime > self.max_age_seconds:
+                    self._remove(entry_dir)
+                else:
+                    entries.append((mtime, size, entry_dir))
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, entry_dir in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                self._remove(entry_dir)
+                total_size -= size
+
+    def _remove(self, path: Path):
+        """Remove um diretório do cache ignorando erros"""
+        shutil.rmtree(path, ignore_errors=True)
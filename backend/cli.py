@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linha de comando do LaTeX Generator
+Gera PDFs sem o servidor Flask, em paralelo e recompilando apenas o que mudou
+
+Uso (a partir da raiz do projeto):
+    python -m backend.cli build artigos/ --jobs 8
+    python -m backend.cli build anais.jsonl -o output --force
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Os módulos do backend se importam pelo nome (como em app.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from batch import load_documents
+from build_cache import BuildCache
+from compile_jobs import compile_document
+from latex_generator_v2 import LatexGeneratorV2
+
+# Chave de build de cada saída, usada para pular documentos sem alterações
+STATE_FILE = '.build-state.json'
+
+
+def collect_documents(inputs: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Lista ``(nome, payload)`` a partir de arquivos .json/.jsonl ou diretórios.
+
+    Um arquivo com um único documento gera o nome do próprio arquivo; com
+    vários, ``name`` do documento ou ``<arquivo>_<n>``.
+    """
+    files: List[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix in ('.json', '.jsonl')))
+        else:
+            files.append(path)
+
+    documents = []
+    used = set()
+    for path in files:
+        payloads = load_documents(path.read_text(encoding='utf-8'))
+        for i, data in enumerate(payloads):
+            if len(payloads) == 1:
+                name = path.stem
+            else:
+                name = str(data.get('name') or f"{path.stem}_{i + 1:04d}")
+            name = name.replace(os.sep, '_').replace(' ', '_')
+            base, suffix = name, 2
+            while name in used:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            used.add(name)
+            documents.append((name, data))
+    return documents
+
+
+def build_one(name: str, data: Dict[str, Any], output_dir: str, build_cache: BuildCache,
+              cache_dir: str, previous_key: Optional[str], force: bool) -> Dict[str, Any]:
+    """Compila um documento, ou o pula se a saída já corresponde ao conteúdo atual"""
+    started = time.perf_counter()
+    output_dir = Path(output_dir)
+    result: Dict[str, Any] = {'name': name}
+
+    try:
+        build_key = LatexGeneratorV2.from_payload(
+            data, output_dir=str(output_dir), cache_dir=cache_dir
+        ).get_build_key()
+        result['build_key'] = build_key
+        up_to_date = (
+            not force and build_key == previous_key
+            and (output_dir / f"{name}.pdf").exists()
+            and (output_dir / f"{name}.tex").exists()
+        )
+        if up_to_date:
+            result.update({'status': 'up-to-date', 'success': True})
+        else:
+            compiled = compile_document(data, str(output_dir), build_cache, name,
+                                        cache_dir=cache_dir, build_key=build_key)
+            result.update({
+                'status': ('cached' if compiled['cached'] else 'built') if compiled['success'] else 'failed',
+                'success': compiled['success'],
+                'passes': compiled.get('passes', 0),
+                'message': compiled['message']
+            })
+    except Exception as e:
+        result.update({'status': 'failed', 'success': False, 'message': f"Erro inesperado: {str(e)}"})
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def load_state(output_dir: Path) -> Dict[str, str]:
+    """Chaves de build da execução anterior"""
+    try:
+        return json.loads((output_dir / STATE_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(output_dir: Path, state: Dict[str, str]):
+    """Grava as chaves de build (substituição atômica)"""
+    tmp_path = output_dir / f"{STATE_FILE}.tmp"
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, output_dir / STATE_FILE)
+
+
+def cmd_build(args) -> int:
+    """Subcomando ``build``"""
+    started = time.perf_counter()
+    documents = collect_documents(args.inputs)
+    if not documents:
+        print("Nenhum documento encontrado")
+        return 1
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    build_cache = BuildCache(args.cache_dir)
+    state = load_state(output_dir)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(documents))) as executor:
+        futures = [
+            executor.submit(build_one, name, data, str(output_dir), build_cache, args.cache_dir,
+                            state.get(name), args.force)
+            for name, data in documents
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['success']:
+                state[result['name']] = result['build_key']
+            else:
+                state.pop(result['name'], None)
+
+            line = f"{result['name']:<40} {result['status']:>10} {result['seconds']:>8.2f}s"
+            print(line if result['success'] else f"{line}  {result.get('message', '')}", flush=True)
+
+    save_state(output_dir, state)
+
+    wall = time.perf_counter() - started
+    counts = {status: sum(1 for r in results if r['status'] == status)
+              for status in ('built', 'cached', 'up-to-date', 'failed')}
+    busy = sum(r['seconds'] for r in results)
+    print(f"\n{len(results)} documentos em {wall:.2f}s ({jobs} processos): "
+          + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    if results:
+        slowest = max(results, key=lambda r: r['seconds'])
+        print(f"Tempo somado: {busy:.2f}s (paralelismo efetivo {busy / wall:.1f}x); "
+              f"mais lento: {slowest['name']} ({slowest['seconds']:.2f}s)")
+
+    return 1 if counts['failed'] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m backend.cli', description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Compila documentos .json/.jsonl")
+    build.add_argument('inputs', nargs='+', help="Arquivos .json/.jsonl ou diretórios")
+    build.add_argument('--jobs', '-j', type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    build.add_argument('--output-dir', '-o', default='output', help="Diretório dos PDFs/.tex")
+    build.add_argument('--cache-dir', default='cache', help="Cache de builds e formatos")
+    build.add_argument('--force', action='store_true', help="Recompilar mesmo sem alterações")
+    build.set_defaults(func=cmd_build)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fila assíncrona de compilação de PDFs
+Pool limitado de processos que executa o pdflatex fora das threads do Flask
+"""
+
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from latex_generator_v2 import LatexGeneratorV2
+from build_cache import BuildCache
+from figure_store import link_file
+
+
+class QueueFullError(Exception):
+    """Fila de compilação saturada (mapeado para HTTP 429)"""
+
+
+def compile_document(data: Dict[str, Any], output_dir: str, build_cache: BuildCache,
+                     output_name: str, cache_dir: Optional[str] = None,
+                     build_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compilar um documento completo consultando o cache de builds.
+
+    Usado tanto pelo endpoint síncrono ``/api/generate`` quanto pelos
+    workers da fila, por isso precisa ser uma função de módulo (picklable).
+    ``cache_dir`` é o diretório dos formatos, derivados de figuras e builds
+    temporários (``CACHE_FOLDER``, onde o gunicorn pré-compila os formatos).
+    ``build_key`` evita renderizar o documento de novo quando o chamador
+    já calculou a chave (ex.: a CLI, que a compara com a execução anterior).
+
+    Returns:
+        Dicionário com ``success``, ``message``, ``cached``, ``passes``
+        (execuções do pdflatex), nomes dos arquivos gerados e
+        ``latex_code`` em caso de falha.
+    """
+    output_dir = Path(output_dir)
+    generator = LatexGeneratorV2.from_payload(data, output_dir=str(output_dir), cache_dir=cache_dir)
+
+    pdf_filename = f"{output_name}.pdf"
+    latex_filename = f"{output_name}.tex"
+    result = {
+        'pdf_filename': pdf_filename,
+        'latex_filename': latex_filename,
+        'sections_count': len(generator.sections)
+    }
+
+    # Consultar cache de compilação antes de rodar o pdflatex
+    build_key = build_key or generator.get_build_key()
+    cached_files = build_cache.get(build_key)
+
+    if cached_files:
+        link_file(cached_files['pdf'], output_dir / pdf_filename, allow_symlink=False)
+        link_file(cached_files['latex'], output_dir / latex_filename, allow_symlink=False)
+        result.update({'success': True, 'cached': True, 'passes': 0, 'message': 'PDF obtido do cache'})
+        return result
+
+    success, message, files = generator.compile_to_pdf(output_name)
+    result['passes'] = generator.compile_passes
+
+    if success:
+        try:
+            build_cache.put(build_key, files)
+        except Exception:
+            pass
+        result.update({'success': True, 'cached': False, 'message': message})
+    else:
+        result.update({
+            'success': False,
+            'cached': False,
+            'message': message,
+            'latex_code': generator.generate_latex()
+        })
+
+    return result
+
+
+class CompileJobQueue:
+    """
+    Fila de jobs de compilação com backpressure.
+
+    ``submit`` retorna imediatamente um id de job; um ``ProcessPoolExecutor``
+    com ``max_workers`` processos drena a fila. Quando há ``max_pending``
+    jobs ainda não concluídos, novos envios levantam ``QueueFullError``.
+    """
+
+    def __init__(self, output_dir: str, build_cache: BuildCache, cache_dir: str = None,
+                 max_workers: int = None, max_pending: int = None, job_ttl: int = 3600):
+        """
+        Inicializa a fila.
+
+        Args:
+            output_dir: Diretório onde os PDFs/.tex finais são gravados
+            build_cache: Cache de builds compartilhado com /api/generate
+            cache_dir: Diretório de formatos, derivados e builds temporários
+            max_workers: Número de processos de compilação
+            max_pending: Máximo de jobs na fila ou em execução
+            job_ttl: Tempo (s) que jobs concluídos ficam consultáveis
+        """
+        self.output_dir = str(output_dir)
+        self.build_cache = build_cache
+        self.cache_dir = str(cache_dir) if cache_dir else None
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self.job_ttl = job_ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Cria o pool de processos sob demanda (no primeiro job)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def pending_count(self) -> int:
+        """Número de jobs na fila ou em execução"""
+        with self._lock:
+            return self._pending_count()
+
+    def _pending_count(self) -> int:
+        """Como ``pending_count``, com ``_lock`` já adquirido"""
+        return sum(1 for job in self._jobs.values() if not job['future'].done())
+
+    def submit(self, data: Dict[str, Any], output_name: Optional[str] = None,
+               on_done: Optional[Callable[[], None]] = None) -> str:
+        """Enfileira um documento para compilação e retorna o id do job (``on_done`` é chamado ao final)"""
+        with self._lock:
+            self._prune()
+
+            if self._pending_count() >= self.max_pending:
+                raise QueueFullError(
+                    f'Fila de compilação cheia ({self.max_pending} jobs pendentes)'
+                )
+
+            job_id = uuid.uuid4().hex[:12]
+            future = self._get_executor().submit(
+                compile_document, data, self.output_dir, self.build_cache,
+                output_name or f"article_{job_id}", self.cache_dir
+            )
+            self._jobs[job_id] = {
+                'future': future,
+                'submitted_at': time.time(),
+                'finished_at': None
+            }
+            future.add_done_callback(lambda f, job_id=job_id: self._mark_finished(job_id))
+            if on_done:
+                future.add_done_callback(lambda f: on_done())
+
+        return job_id
+
+    def submit_batch(self, documents: List[Dict[str, Any]], max_in_flight: Optional[int] = None,
+                     on_done: Optional[Callable[[], None]] = None) -> str:
+        """
+        Enfileira um lote (ver ``batch.run_batch``) e retorna o id do job.
+
+        Os documentos são compilados no mesmo pool dos demais jobs, com no
+        máximo ``max_in_flight`` (limitado a ``max_workers``) em andamento; o
+        lote conta como um job pendente. O resultado traz o manifesto e o zip
+        ``batch_<id>.zip`` gravado em ``output_dir``.
+        """
+        with self._lock:
+            self._prune()
+
+            if self._pending_count() >= self.max_pending:
+                raise QueueFullError(
+                    f'Fila de compilação cheia ({self.max_pending} jobs pendentes)'
+                )
+
+            job_id = uuid.uuid4().hex[:12]
+            future: Future = Future()
+            self._jobs[job_id] = {
+                'future': future,
+                'submitted_at': time.time(),
+                'finished_at': None
+            }
+            future.add_done_callback(lambda f, job_id=job_id: self._mark_finished(job_id))
+            if on_done:
+                future.add_done_callback(lambda f: on_done())
+
+            executor = self._get_executor()
+            in_flight = min(max_in_flight or self.max_workers, self.max_workers)
+
+        threading.Thread(
+            target=self._run_batch, args=(future, job_id, documents, executor, in_flight),
+            name=f"batch-{job_id}", daemon=True
+        ).start()
+        return job_id
+
+    def _run_batch(self, future: Future, job_id: str, documents: List[Dict[str, Any]],
+                   executor: ProcessPoolExecutor, in_flight: int):
+        """Thread coordenadora de um lote: envia os documentos ao pool e gera o zip"""
+        from batch import run_batch, write_zip
+
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            manifest = run_batch(documents, self.output_dir, self.build_cache,
+                                 max_workers=in_flight, batch_id=job_id, executor=executor,
+                                 cache_dir=self.cache_dir)
+            zip_filename = f"batch_{job_id}.zip"
+            write_zip(manifest, self.output_dir, str(Path(self.output_dir) / zip_filename))
+        except BaseException as e:
+            future.set_exception(e)
+            return
+
+        future.set_result({
+            'success': True,
+            'message': f"{manifest['succeeded']} de {manifest['total']} documentos gerados "
+                       f"em {manifest['seconds']:.2f}s",
+            'manifest': manifest,
+            'zip_filename': zip_filename
+        })
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Aguarda o resultado de um job (usado pelo endpoint síncrono /api/generate).
+
+        Levanta ``concurrent.futures.TimeoutError`` se o job não terminar a tempo.
+        """
+        return self._jobs[job_id]['future'].result(timeout=timeout)
+
+    def _mark_finished(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job:
+            job['finished_at'] = time.time()
+
+    def _prune(self):
+        """Esquece jobs concluídos há mais de ``job_ttl`` segundos"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] and now - job['finished_at'] > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o status de um job ou None se ele não existir.
+
+        ``status`` é ``queued`` (com ``queue_position``), ``running``,
+        ``completed`` ou ``failed``.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            waiting = sorted(
+                (other['submitted_at'], other_id) for other_id, other in self._jobs.items()
+                if not other['future'].done() and not other['future'].running()
+            )
+
+        future: Future = job['future']
+        status = {
+            'job_id': job_id,
+            'submitted_at': job['submitted_at'],
+            'queue_position': None,
+            'result': None
+        }
+
+        if future.done():
+            status['finished_at'] = job['finished_at']
+            error = future.exception()
+            if error is not None:
+                status.update({'status': 'failed', 'message': str(error)})
+            else:
+                result = future.result()
+                status.update({
+                    'status': 'completed' if result['success'] else 'failed',
+                    'message': result['message'],
+                    'result': result
+                })
+        elif future.running():
+            status['status'] = 'running'
+        else:
+            waiting_ids = [other_id for _, other_id in waiting]
+            if job_id in waiting_ids:
+                status.update({'status': 'queued', 'queue_position': waiting_ids.index(job_id) + 1})
+            else:
+                # Começou a executar depois da cópia da fila
+                status['status'] = 'running'
+
+        return status
+
+    def shutdown(self):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Partes do documento (autores, seções, referências, figuras e tabelas)
+Registros compactos com __slots__, validados uma única vez na inserção
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Tuple
+
+
+class DocumentPart:
+    """
+    Base dos registros do documento.
+
+    Subclasses declaram ``__slots__`` com seus campos; não há ``__dict__``
+    por instância, o que reduz a memória de documentos com centenas de
+    seções e torna o acesso aos campos um acesso direto a atributo.
+    """
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Leitura de todos os campos em uma única chamada em C (todas as partes têm 2+ campos)
+        cls._fields_getter = attrgetter(*cls.__slots__)
+
+    def as_tuple(self) -> Tuple[Any, ...]:
+        """Valores dos campos, na ordem de ``__slots__`` (usado como chave de cache)"""
+        return self._fields_getter(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representação em dicionário (JSON)"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _text(value: Any) -> str:
+    """Normaliza um campo de texto (None vira string vazia)"""
+    return "" if value is None else str(value)
+
+
+class Author(DocumentPart):
+    """Autor do documento"""
+
+    __slots__ = ('name', 'affiliation', 'email')
+
+    def __init__(self, name: str, affiliation: str = "", email: str = ""):
+        self.name = _text(name)
+        self.affiliation = _text(affiliation)
+        self.email = _text(email)
+
+
+class Section(DocumentPart):
+    """Seção do documento (nível 1 = \\section, 2 = \\subsection, ...)"""
+
+    __slots__ = ('title', 'content', 'level')
+
+    def __init__(self, title: str, content: str, level: int = 1):
+        self.title = _text(title).strip()
+        self.content = _text(content).strip()
+        try:
+            self.level = int(level)
+        except (TypeError, ValueError):
+            self.level = 1
+
+
+class Reference(DocumentPart):
+    """Referência bibliográfica"""
+
+    __slots__ = ('author', 'title', 'journal', 'year', 'pages', 'doi')
+
+    def __init__(self, author: str, title: str, journal: str = "",
+                 year: str = "", pages: str = "", doi: str = ""):
+        self.author = _text(author)
+        self.title = _text(title)
+        self.journal = _text(journal)
+        self.year = _text(year)
+        self.pages = _text(pages)
+        self.doi = _text(doi)
+
+
+class Figure(DocumentPart):
+    """Figura (os dados já devem vir corrigidos por _validate_and_fix_figure_data)"""
+
+    __slots__ = ('caption', 'label', 'filename', 'width')
+
+    def __init__(self, caption: str, label: str, filename: str, width: str = "0.8\\textwidth"):
+        self.caption = _text(caption)
+        self.label = _text(label)
+        self.filename = _text(filename).strip()
+        self.width = _text(width) or "0.8\\textwidth"
+
+
+class Table(DocumentPart):
+    """Tabela: linhas de células (a primeira linha é o cabeçalho)"""
+
+    __slots__ = ('rows', 'caption', 'label')
+
+    def __init__(self, rows: Any, caption: str = "", label: str = ""):
+        self.rows = tuple(
+            tuple(_text(cell) for cell in row) if isinstance(row, (list, tuple)) else (_text(row),)
+            for row in (rows or ()) if row not in (None, '', [], ())
+        )
+        self.caption = _text(caption)
+        self.label = _text(label)
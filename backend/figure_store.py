@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de figuras endereçado por conteúdo
+Cada upload é gravado uma única vez, com o nome derivado do seu hash SHA-256
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leitura/escrita em blocos: uploads grandes nunca ficam inteiros em memória
+CHUNK_SIZE = 1024 * 1024
+
+# Hashes de arquivos fora do padrão de blob mantidos em memória (por caminho, mtime e tamanho)
+DIGEST_CACHE_ENTRIES = 4096
+
+_digests: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_digests_lock = threading.Lock()
+
+# Nome dos blobs: <sha256>.<extensão>
+BLOB_NAME_PATTERN = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]+)?$')
+
+
+class StoredFigure(NamedTuple):
+    """Resultado de um upload"""
+    digest: str
+    filename: str
+    path: Path
+    size: int
+    created: bool
+
+
+def content_digest(path: Path) -> Optional[str]:
+    """
+    Hash de um blob a partir do nome do arquivo, sem lê-lo.
+
+    Retorna None para arquivos que não seguem o padrão ``<sha256>.<ext>``
+    (ex.: uploads antigos com prefixo uuid/timestamp).
+    """
+    match = BLOB_NAME_PATTERN.match(Path(path).name)
+    return match.group(1) if match else None
+
+
+def file_digest(path: Path) -> str:
+    """
+    Hash SHA-256 de um arquivo; blobs do store usam o hash do nome.
+
+    Os demais (ex.: uploads antigos) são lidos uma vez e o hash fica em
+    memória enquanto o arquivo mantiver o mesmo ``mtime`` e tamanho.
+    """
+    digest = content_digest(path)
+    if digest:
+        return digest
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digests_lock:
+        _digests[key] = digest
+        while len(_digests) > DIGEST_CACHE_ENTRIES:
+            _digests.popitem(last=False)
+    return digest
+
+
+def link_file(source: Path, dest: Path, allow_symlink: bool = True) -> str:
+    """
+    Disponibiliza ``source`` em ``dest`` sem copiar os dados quando possível.
+
+    Tenta hardlink, depois symlink e, por último, cópia. O destino é
+    substituído atomicamente se já existir com outro conteúdo. Use
+    ``allow_symlink=False`` quando ``source`` pode ser removido antes de
+    ``dest`` (ex.: entradas do cache de builds).
+
+    Returns:
+        Método usado: ``'existing'``, ``'hardlink'``, ``'symlink'`` ou ``'copy'``
+    """
+    source = Path(source).resolve()
+    dest = Path(dest)
+
+    try:
+        if dest.exists() and os.path.samefile(source, dest):
+            return 'existing'
+    except OSError:
+        pass
+
+    tmp = dest.with_name(f"tmp_{uuid.uuid4().hex}_{dest.name}")
+    methods = ('hardlink', 'symlink', 'copy') if allow_symlink else ('hardlink', 'copy')
+    for method in methods:
+        try:
+            if method == 'hardlink':
+                os.link(source, tmp)
+            elif method == 'symlink':
+                os.symlink(source, tmp)
+            else:
+                shutil.copy2(source, tmp)
+            os.replace(tmp, dest)
+            return method
+        except OSError as e:
+            logger.debug("Falha ao disponibilizar %s via %s: %s", source, method, e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    raise OSError(f"Não foi possível disponibilizar {source} em {dest}")
+
+
+class FigureStore:
+    """
+    Store de figuras deduplicado.
+
+    Os blobs ficam em ``<root>/<sha256>.<ext>``, então o mesmo arquivo
+    enviado várias vezes (ou por vários usuários) ocupa espaço uma única
+    vez. Os blobs são imutáveis: o nome identifica o conteúdo, o que permite
+    que compilações os referenciem por hardlink/symlink em vez de cópia.
+    """
+
+    def __init__(self, root: str):
+        """
+        Inicializa o store.
+
+        Args:
+            root: Diretório dos blobs (o mesmo servido em /api/uploads)
+        """
+        self.root = Path(root)
+        self.incoming_dir = self.root / ".incoming"
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str, extension: str = "") -> Path:
+        """Caminho do blob com o hash e extensão informados"""
+        return self.root / f"{digest}{extension.lower()}"
+
+    def save_stream(self, stream: BinaryIO, original_name: str = "") -> StoredFigure:
+        """
+        Grava um upload calculando o hash durante a escrita.
+
+        O conteúdo vai para um arquivo temporário em ``.incoming/`` e só é
+        publicado (``os.replace``) se ainda não existir um blob com o mesmo
+        hash; caso contrário o temporário é descartado.
+        """
+        extension = Path(original_name).suffix.lower()
+        tmp_path = self.incoming_dir / uuid.uuid4().hex
+        sha = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+
+            digest = sha.hexdigest()
+            path = self.path_for(digest, extension)
+            created = not path.exists()
+            if created:
+                os.replace(tmp_path, path)
+            else:
+                tmp_path.unlink()
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        logger.debug("Figura %s: %s (%d bytes)", 'armazenada' if created else 'deduplicada', path.name, size)
+        return StoredFigure(digest, path.name, path, size, created)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de fragmentos LaTeX para a prévia incremental
+Guarda o LaTeX formatado de cada autor/seção/figura/referência pelo hash da entrada
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+
+def fragment_id(text: str) -> str:
+    """Identificador de um fragmento já renderizado (hash do texto)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class FragmentCache:
+    """
+    Cache LRU compartilhado entre requisições de ``/api/preview``.
+
+    A chave é o tipo do fragmento mais o hash dos dados de entrada, então
+    uma seção só é reformatada quando seu título, conteúdo ou nível muda.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de fragmentos mantidos em memória
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind: str, data: Any) -> str:
+        """Chave do fragmento a partir do tipo e dos dados de entrada"""
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def get_or_render(self, kind: str, data: Any, render: Callable[[], str]) -> str:
+        """Retorna o fragmento do cache ou o renderiza e armazena"""
+        key = self.make_key(kind, data)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        fragment = render()
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return fragment
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuração do gunicorn para produção
+Dimensiona workers web e processos de compilação pelo número de núcleos
+
+Uso (a partir de backend/):
+    gunicorn -c gunicorn.conf.py main:app
+
+Modelo de workers:
+    - WEB_WORKERS processos gunicorn (padrão: núcleos), cada um com
+      WEB_THREADS threads (padrão: 8), atendem as rotas leves
+      (/api/preview, /api/templates, uploads, downloads).
+    - A compilação (/api/generate, /api/jobs) nunca roda nessas threads: cada
+      worker web tem seu pool de COMPILE_WORKERS processos pdflatex
+      (padrão: núcleos / WEB_WORKERS, ou seja, ~1 compilação por núcleo no
+      total).
+    - Cada worker aceita no máximo COMPILE_QUEUE_MAX compilações pendentes
+      (padrão: metade das threads); acima disso /api/generate responde 429,
+      de forma que sempre sobram threads para as rotas leves.
+    - Com mais de um worker, as cotas por cliente (RATE_LIMIT_*) ficam em
+      SQLite (cache/rate_limit.sqlite3) para valerem para o servidor todo,
+      e não para cada worker separadamente.
+"""
+
+import os
+import multiprocessing
+
+cpus = multiprocessing.cpu_count()
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', '0')) or cpus
+threads = int(os.environ.get('WEB_THREADS', '8'))
+
+# Lidos por app.load_config() em cada worker
+os.environ.setdefault('COMPILE_WORKERS', str(max(1, cpus // workers)))
+os.environ.setdefault('COMPILE_QUEUE_MAX', str(max(1, threads // 2)))
+if workers > 1:
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'sqlite')
+
+# Maior que COMPILE_TIMEOUT: /api/generate aguarda a compilação
+timeout = int(os.environ.get('WEB_TIMEOUT', '180'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recicla workers periodicamente (limita crescimento de memória)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', '10000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+def on_starting(server):
+    """
+    Pré-compila os formatos LaTeX uma única vez, no processo master.
+
+    Os workers encontram os .fmt prontos em cache/formats e não repetem o
+    trabalho (LATEX_PREWARM=0).
+    """
+    if os.environ.get('LATEX_PREWARM', '1') in ('0', 'false', 'no'):
+        return
+    os.chdir(chdir)
+
+    from latex_compiler import get_compiler
+    from template_registry import get_template_registry
+
+    formats_dir = os.path.join(os.environ.get('CACHE_FOLDER', 'cache'), 'formats')
+    try:
+        formats = get_compiler(formats_dir).prepare_formats(get_template_registry().sources)
+        ready = [name for name, fmt_name in formats.items() if fmt_name]
+        server.log.info("Formatos LaTeX pré-compilados: %s", ', '.join(ready) or 'nenhum')
+    except Exception as e:
+        server.log.warning("Falha ao pré-compilar formatos LaTeX: %s", e)
+    os.environ['LATEX_PREWARM'] = '0'
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s: %s threads, %s processos de compilação, até %s compilações pendentes",
+                    worker.pid, threads, os.environ['COMPILE_WORKERS'], os.environ['COMPILE_QUEUE_MAX'])
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pré-processamento de figuras
+Converte, reduz e limpa metadados das imagens uma única vez, com derivados em cache por hash
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from figure_store import file_digest
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional: sem ele, apenas formatos nativos do pdflatex são usados
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Formatos que o pdflatex inclui diretamente
+PDFLATEX_FORMATS = {'.png', '.jpg', '.jpeg', '.pdf'}
+
+# Tag EXIF de orientação (fotos de celular em retrato são gravadas deitadas)
+EXIF_ORIENTATION = 0x0112
+
+# Segmentos JPEG de metadados (APP1-APP13, APP15: EXIF/GPS, XMP, ICC, IPTC...; COM).
+# APP0 (JFIF) e APP14 (Adobe, transformação de cores) afetam a decodificação e são mantidos
+JPEG_METADATA_MARKERS = frozenset(range(0xE1, 0xEE)) | {0xEF, 0xFE}
+
+# Versão do processamento: entra no nome dos derivados e miniaturas, de forma
+# que mudanças no pipeline (ex.: orientação EXIF) não reaproveitem os antigos
+PIPELINE_VERSION = 3
+
+# Tamanhos fixos de miniatura (maior lado, em px)
+THUMBNAIL_SIZES = {'small': 128, 'medium': 320, 'large': 640}
+
+
+class FigurePreprocessor:
+    """
+    Gera derivados das figuras prontos para o pdflatex.
+
+    - GIF/BMP/TIFF viram PNG; SVG vira PDF (via ``rsvg-convert``, se instalado)
+    - Imagens mais largas que ``max_dpi`` × ``target_width_in`` são reduzidas
+    - A orientação EXIF é aplicada aos pixels; depois os metadados (EXIF,
+      perfis, comentários) são descartados
+    - JPEGs que não precisam de rotação nem redução não são recomprimidos:
+      apenas os segmentos de metadados são removidos do arquivo
+
+    Cada derivado fica em ``<cache_dir>/<sha256>_<params>.<ext>``: o mesmo
+    arquivo com os mesmos parâmetros é processado uma única vez, e
+    alterar os parâmetros gera novos derivados sem invalidar os antigos.
+    """
+
+    def __init__(self, cache_dir: str, max_dpi: int = 300, target_width_in: float = 6.5,
+                 jpeg_quality: int = 85, workers: int = 2):
+        """
+        Inicializa o pré-processador.
+
+        Args:
+            cache_dir: Diretório dos derivados
+            max_dpi: Resolução máxima na largura alvo
+            target_width_in: Largura alvo (polegadas), ex. a largura do texto
+            jpeg_quality: Qualidade dos JPEGs regravados
+            workers: Threads do processamento em segundo plano
+        """
+        self.cache_dir = Path(cache_dir).resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_width_px = int(max_dpi * target_width_in)
+        self.jpeg_quality = jpeg_quality
+        self.params_tag = hashlib.sha256(
+            f"{PIPELINE_VERSION}:{self.max_width_px}:{jpeg_quality}".encode('utf-8')
+        ).hexdigest()[:8]
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source: Path) -> Future:
+        """Agenda o processamento em segundo plano (ex.: logo após o upload)"""
+        key = str(Path(source).resolve())
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='figures')
+            future = self._executor.submit(self.process, source)
+            self._pending[key] = future
+
+        # Fora do lock: se o future já terminou, o callback roda nesta thread
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def resolve(self, source: Path) -> Path:
+        """
+        Caminho a usar na compilação: o derivado, ou o original se não houver.
+
+        Aguarda um processamento em andamento do mesmo arquivo em vez de
+        repeti-lo.
+        """
+        with self._lock:
+            future = self._pending.get(str(Path(source).resolve()))
+        try:
+            if future is not None:
+                return future.result()
+            return self.process(source)
+        except Exception as e:
+            logger.warning("Falha ao pré-processar figura %s: %s", source, e)
+            return Path(source)
+
+    def process(self, source: Path) -> Path:
+        """Gera (ou reaproveita) o derivado de ``source``"""
+        source = Path(source)
+        extension = source.suffix.lower()
+        target_ext = self._target_extension(extension)
+        if target_ext is None:
+            return source
+
+        digest = file_digest(source)
+        derivative = self.cache_dir / f"{digest}_{self.params_tag}{target_ext}"
+        if derivative.exists():
+            return derivative
+
+        tmp_path = self.cache_dir / f"tmp_{uuid.uuid4().hex}{target_ext}"
+        try:
+            if extension == '.svg':
+                self._convert_svg(source, tmp_path)
+            else:
+                self._convert_raster(source, tmp_path, target_ext)
+            os.replace(tmp_path, derivative)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        logger.debug("Figura pré-processada: %s -> %s", source.name, derivative.name)
+        return derivative
+
+    def thumbnail(self, source: Path, size: str) -> Optional[Path]:
+        """
+        Miniatura de ``source`` (gerada na primeira chamada e mantida em disco).
+
+        Returns:
+            Caminho da miniatura, ou None se não for possível gerá-la (sem
+            Pillow, formato vetorial ou tamanho desconhecido)
+        """
+        source = Path(source)
+        max_px = THUMBNAIL_SIZES.get(size)
+        extension = source.suffix.lower()
+        if max_px is None or Image is None or extension in ('.svg', '.pdf', '.eps'):
+            return None
+
+        target_ext = '.jpg' if extension in ('.jpg', '.jpeg') else '.png'
+        thumbs_dir = self.cache_dir / "thumbs"
+        thumb = thumbs_dir / f"{file_digest(source)}_{self.thumbnail_tag(size)}{target_ext}"
+        if thumb.exists():
+            return thumb
+
+        thumbs_dir.mkdir(exist_ok=True)
+        tmp_path = thumbs_dir / f"tmp_{uuid.uuid4().hex}{target_ext}"
+        try:
+            with Image.open(source) as image:
+                image.seek(0)
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((max_px, max_px), Image.LANCZOS)
+                self._save(image, tmp_path, target_ext)
+            os.replace(tmp_path, thumb)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        return thumb
+
+    def thumbnail_tag(self, size: str) -> str:
+        """Identifica a versão e os parâmetros de uma miniatura (nome do arquivo e ETag)"""
+        return f"{self.params_tag}_{size}{THUMBNAIL_SIZES.get(size, '')}"
+
+    def _target_extension(self, extension: str) -> Optional[str]:
+        """Extensão do derivado (None: usar o original sem alterações)"""
+        if extension == '.svg':
+            return '.pdf' if shutil.which('rsvg-convert') else None
+        if extension == '.pdf' or Image is None:
+            return None
+        if extension in ('.jpg', '.jpeg'):
+            return '.jpg'
+        return '.png'
+
+    def _convert_raster(self, source: Path, dest: Path, target_ext: str):
+        """Gira conforme o EXIF, reduz, converte e regrava sem metadados"""
+        with Image.open(source) as image:
+            image.seek(0)  # GIF animado: apenas o primeiro quadro
+            rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+            if (target_ext == '.jpg' and image.format == 'JPEG' and not rotated
+                    and image.width <= self.max_width_px):
+                # Nada a alterar nos pixels: recomprimir só perderia qualidade
+                try:
+                    strip_jpeg_metadata(source, dest)
+                    return
+                except ValueError as e:
+                    logger.debug("JPEG %s regravado (%s)", source.name, e)
+            image = ImageOps.exif_transpose(image)
+            if image.width > self.max_width_px:
+                height = max(1, round(image.height * self.max_width_px / image.width))
+                image = image.resize((self.max_width_px, height), Image.LANCZOS)
+            self._save(image, dest, target_ext)
+
+    def _save(self, image, dest: Path, target_ext: str):
+        """Grava como JPEG ou PNG; save() sem exif/pnginfo não copia metadados"""
+        if target_ext == '.jpg':
+            image.convert('RGB').save(dest, 'JPEG', quality=self.jpeg_quality, optimize=True)
+        else:
+            if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            image.save(dest, 'PNG', optimize=True)
+
+    def _convert_svg(self, source: Path, dest: Path):
+        """SVG -> PDF vetorial"""
+        subprocess.run(
+            ['rsvg-convert', '-f', 'pdf', '-o', str(dest), str(source)],
+            check=True, capture_output=True, timeout=60
+        )
+
+
+def strip_jpeg_metadata(source: Path, dest: Path):
+    """
+    Copia um JPEG sem os segmentos de metadados, sem recomprimir.
+
+    Os segmentos antes do início da imagem (SOS) são filtrados; os dados
+    comprimidos são copiados como estão. Levanta ``ValueError`` se o
+    arquivo não tiver a estrutura esperada.
+    """
+    data = Path(source).read_bytes()
+    if data[:2] != b'\xff\xd8':
+        raise ValueError('sem marcador SOI')
+
+    parts = [data[:2]]
+    pos = 2
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            raise ValueError('segmento inválido')
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Byte de preenchimento
+            pos += 1
+            continue
+        if marker == 0xDA:  # SOS: daqui em diante, dados da imagem
+            parts.append(data[pos:])
+            break
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if end > len(data):
+            raise ValueError('segmento truncado')
+        if marker not in JPEG_METADATA_MARKERS:
+            parts.append(data[pos:end])
+        pos = end
+
+    Path(dest).write_bytes(b''.join(parts))
+
+
+_preprocessors: Dict[str, FigurePreprocessor] = {}
+_preprocessors_lock = threading.Lock()
+
+
+def get_preprocessor(cache_dir: str) -> FigurePreprocessor:
+    """Pré-processador compartilhado por diretório de derivados (um por processo)"""
+    key = str(Path(cache_dir).resolve())
+    with _preprocessors_lock:
+        if key not in _preprocessors:
+            _preprocessors[key] = FigurePreprocessor(
+                cache_dir,
+                max_dpi=int(os.environ.get('FIGURE_MAX_DPI', '300')),
+                target_width_in=float(os.environ.get('FIGURE_TARGET_WIDTH_IN', '6.5')),
+                jpeg_quality=int(os.environ.get('FIGURE_JPEG_QUALITY', '85'))
+            )
+        return _preprocessors[key]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de compilação LaTeX com preâmbulos pré-compilados
+Gera um arquivo de formato (.fmt) por template e o reutiliza em cada compilação
+"""
+
+import os
+import re
+import hashlib
+import subprocess
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+# Extensões auxiliares removidas após a compilação
+AUX_EXTENSIONS = ['.aux', '.log', '.out', '.toc']
+
+# Entradas do .aux que indicam referências cruzadas a resolver
+AUX_REFERENCE_MARKERS = ['\\newlabel', '\\bibcite']
+
+# Entradas de sumário/listas: o pdflatex as grava a cada \section, mas só
+# \tableofcontents e \listof... (fora de comentários) as leem de volta
+AUX_LIST_MARKER = '\\@writefile'
+LIST_COMMANDS = re.compile(r'^[^%\n]*\\(?:tableofcontents|listof[a-z]+)\b', re.MULTILINE)
+
+
+class LatexCompiler:
+    """
+    Compilador pdflatex com cache de formatos.
+
+    O preâmbulo de cada template (tudo antes do primeiro placeholder, ou
+    seja, ``\\documentclass`` e os ``\\usepackage``) é carregado uma única vez
+    por ``pdflatex -ini`` e salvo com ``\\dump`` em ``<formats_dir>``. As
+    compilações seguintes carregam o formato com ``-fmt`` e só processam o
+    corpo do documento. Se o formato não existir ou o documento não começar
+    com o preâmbulo esperado, a compilação completa é usada.
+    """
+
+    def __init__(self, formats_dir: str, pdflatex: str = 'pdflatex', timeout: int = 30,
+                 max_passes: int = 3):
+        """
+        Inicializa o compilador.
+
+        Args:
+            formats_dir: Diretório onde os arquivos .fmt são gravados
+            pdflatex: Executável do pdflatex
+            timeout: Tempo máximo (s) de cada execução
+            max_passes: Máximo de execuções para estabilizar o .aux
+        """
+        self.formats_dir = Path(formats_dir)
+        self.pdflatex = pdflatex
+        self.timeout = timeout
+        self.max_passes = max(1, max_passes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def split_preamble(template: str) -> Tuple[str, str]:
+        """Separa o template em preâmbulo fixo e corpo (a partir do 1º placeholder)"""
+        placeholder = template.find('{{')
+        if placeholder == -1:
+            placeholder = template.find('\\begin{document}')
+        if placeholder == -1:
+            return "", template
+
+        line_start = template.rfind('\n', 0, placeholder) + 1
+        return template[:line_start], template[line_start:]
+
+    def format_name(self, template_name: str, preamble: str) -> str:
+        """Nome do formato: muda sempre que o preâmbulo muda"""
+        digest = hashlib.sha256(preamble.encode('utf-8')).hexdigest()[:12]
+        return f"{template_name}_{digest}"
+
+    def _env(self) -> Dict[str, str]:
+        """Ambiente com o diretório de formatos antes dos caminhos padrão"""
+        env = os.environ.copy()
+        env['TEXFORMATS'] = f"{self.formats_dir.resolve()}{os.pathsep}"
+        return env
+
+    def build_format(self, template_name: str, template: str) -> Optional[str]:
+        """
+        Gera (se necessário) o formato do template e retorna seu nome.
+
+        Returns:
+            Nome do formato ou None se o template não tem preâmbulo
+            separável ou o pdflatex falhou.
+        """
+        preamble, _ = self.split_preamble(template)
+        if not preamble:
+            return None
+
+        fmt_name = self.format_name(template_name, preamble)
+        fmt_path = self.formats_dir / f"{fmt_name}.fmt"
+        if fmt_path.exists():
+            return fmt_name
+
+        with self._lock:
+            if fmt_path.exists():
+                return fmt_name
+
+            self.formats_dir.mkdir(parents=True, exist_ok=True)
+
+            # Gerar em nome temporário e publicar com rename: outros
+            # processos (workers da fila) podem estar gerando o mesmo formato
+            # (sem ponto inicial: o kpathsea recusa gravar arquivos ocultos)
+            tmp_name = f"tmp_{fmt_name}_{uuid.uuid4().hex[:8]}"
+            ini_file = self.formats_dir / f"{tmp_name}.ini.tex"
+            ini_file.write_text(preamble + "\n\\dump\n", encoding='utf-8')
+
+            try:
+                subprocess.run([
+                    self.pdflatex,
+                    '-ini',
+                    '-interaction=nonstopmode',
+                    f'-jobname={tmp_name}',
+                    '&pdflatex',
+                    ini_file.name
+                ], cwd=str(self.formats_dir), capture_output=True, text=True,
+                    timeout=self.timeout * 2)
+
+                tmp_fmt = self.formats_dir / f"{tmp_name}.fmt"
+                if not tmp_fmt.exists():
+                    return None
+                os.replace(tmp_fmt, fmt_path)
+                return fmt_name
+
+            except (OSError, subprocess.SubprocessError):
+                return None
+            finally:
+                for leftover in self.formats_dir.glob(f"{tmp_name}*"):
+                    try:
+                        leftover.unlink()
+                    except OSError:
+                        pass
+
+    def prepare_formats(self, templates: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Gera os formatos de todos os templates (chamado na inicialização)"""
+        return {name: self.build_format(name, template) for name, template in templates.items()}
+
+    def compile(self, latex_source: Union[str, Iterable[str]], template_name: str, template: str,
+                work_dir: Path, jobname: str) -> Tuple[bool, str, int]:
+        """
+        Compila o documento em ``work_dir/<jobname>.pdf``.
+
+        ``latex_source`` pode ser o código completo ou um iterável de blocos
+        (``LatexGeneratorV2.iter_latex``), gravado em disco sem ser
+        concatenado. O ``.tex`` completo é sempre gravado em
+        ``work_dir/<jobname>.tex``; quando há formato disponível, apenas o
+        corpo é enviado ao pdflatex.
+        O pdflatex é executado novamente enquanto o conteúdo do ``.aux``
+        mudar entre passadas (``\\label``/``\\ref``, ``\\bibitem``/``\\cite`` e,
+        com ``\\tableofcontents``/``\\listof...``, as entradas do sumário),
+        até ``max_passes`` execuções.
+
+        Returns:
+            Tupla (sucesso, mensagem, número de passadas)
+        """
+        work_dir = Path(work_dir)
+        tex_file = work_dir / f"{jobname}.tex"
+        body_file = work_dir / f"{jobname}_body.tex"
+
+        preamble, _ = self.split_preamble(template)
+        fmt_name = None
+        if self._write_sources(latex_source, tex_file, body_file, preamble):
+            fmt_name = self.build_format(template_name, template)
+
+        self._cleanup(work_dir, jobname)
+        aux_file = work_dir / f"{jobname}.aux"
+        previous_aux = None
+        passes = 0
+
+        try:
+            while passes < self.max_passes:
+                passes += 1
+
+                if fmt_name:
+                    success, output = self._run(body_file.name, work_dir, jobname, fmt_name)
+                    if not success and passes == 1:
+                        # Alguns pacotes não toleram \dump: repetir com o preâmbulo completo
+                        fmt_name = None
+                if not fmt_name:
+                    success, output = self._run(tex_file.name, work_dir, jobname)
+
+                if not success:
+                    return False, f"Erro na compilação: {output}", passes
+
+                aux_hash = self._file_hash(aux_file)
+                if not self._needs_rerun(aux_file, aux_hash, previous_aux, tex_file):
+                    break
+                previous_aux = aux_hash
+
+            mode = " (formato pré-compilado)" if fmt_name else ""
+            return True, f"PDF gerado com sucesso{mode} em {passes} passada(s)", passes
+
+        except subprocess.TimeoutExpired:
+            return False, "Timeout na compilação do PDF", passes
+        finally:
+            self._cleanup(work_dir, jobname)
+            try:
+                body_file.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_sources(latex_source: Union[str, Iterable[str]], tex_file: Path,
+                       body_file: Path, preamble: str) -> bool:
+        """
+        Grava o documento completo e, em paralelo, o corpo sem o preâmbulo.
+
+        Returns:
+            True se o documento começa com o preâmbulo do template (e o
+            corpo foi gravado em ``body_file``)
+        """
+        if isinstance(latex_source, str):
+            latex_source = [latex_source]
+
+        head = ""
+        body = None
+        try:
+            with open(tex_file, 'w', encoding='utf-8') as tex:
+                for chunk in latex_source:
+                    tex.write(chunk)
+
+                    if body is not None:
+                        body.write(chunk)
+                    elif preamble and head is not None:
+                        head += chunk
+                        if len(head) >= len(preamble):
+                            if head.startswith(preamble):
+                                body = open(body_file, 'w', encoding='utf-8')
+                                body.write(head[len(preamble):])
+                            head = None
+        finally:
+            if body is not None:
+                body.close()
+
+        return body is not None
+
+    def _needs_rerun(self, aux_file: Path, aux_hash: Optional[str],
+                     previous_hash: Optional[str], tex_file: Path) -> bool:
+        """Decide se outra passada é necessária comparando o hash do .aux"""
+        if aux_hash is None:
+            return False
+        if previous_hash is None:
+            # Primeira passada: só repetir se há referências a resolver
+            aux_content = aux_file.read_text(encoding='utf-8', errors='replace')
+            if any(marker in aux_content for marker in AUX_REFERENCE_MARKERS):
+                return True
+            return (AUX_LIST_MARKER in aux_content
+                    and LIST_COMMANDS.search(tex_file.read_text(encoding='utf-8', errors='replace')) is not None)
+        return aux_hash != previous_hash
+
+    @staticmethod
+    def _file_hash(path: Path) -> Optional[str]:
+        """Hash do conteúdo do arquivo ou None se ele não existir"""
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _run(self, input_name: str, work_dir: Path, jobname: str,
+             fmt_name: Optional[str] = None) -> Tuple[bool, str]:
+        """Executa o pdflatex uma vez e indica se o PDF foi gerado"""
+        pdf_path = work_dir / f"{jobname}.pdf"
+        if pdf_path.exists():
+            pdf_path.unlink()
+
+        command = [self.pdflatex, '-interaction=nonstopmode', f'-jobname={jobname}']
+        if fmt_name:
+            command.append(f'-fmt={fmt_name}')
+
+        result = subprocess.run(
+            command + [input_name],
+            cwd=str(work_dir), env=self._env(),
+            capture_output=True, text=True, timeout=self.timeout
+        )
+
+        return pdf_path.exists(), result.stderr or result.stdout[-2000:]
+
+    def _cleanup(self, work_dir: Path, jobname: str):
+        """Remove os arquivos auxiliares do pdflatex"""
+        for ext in AUX_EXTENSIONS:
+            try:
+                (work_dir / f"{jobname}{ext}").unlink()
+            except OSError:
+                pass
+
+
+_compilers: Dict[str, LatexCompiler] = {}
+_compilers_lock = threading.Lock()
+
+
+def get_compiler(formats_dir: str) -> LatexCompiler:
+    """Compilador compartilhado por diretório de formatos (um por processo)"""
+    key = str(Path(formats_dir).resolve())
+    with _compilers_lock:
+        if key not in _compilers:
+            _compilers[key] = LatexCompiler(
+                formats_dir,
+                pdflatex=os.environ.get('LATEX_COMPILER', 'pdflatex'),
+                timeout=int(os.environ.get('LATEX_TIMEOUT', '30')),
+                max_passes=int(os.environ.get('LATEX_MAX_PASSES', '3'))
+            )
+        return _compilers[key]
@@ -8,14 +8,27 @@ CORREÇÃO: Problema das figuras com caption/filename trocados
 
 import re
 import uuid
+import itertools
 import datetime
-import os
 import shutil
 import hashlib
-import subprocess
+import logging
 import tempfile
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Any, Tuple
+
+from latex_compiler import get_compiler
+from fragment_cache import FragmentCache, fragment_id
+from document_parts import Author, Section, Reference, Figure, Table
+from template_engine import CompiledTemplate
+from template_registry import TemplateEntry, get_template_registry
+from figure_store import file_digest, link_file
+from image_pipeline import FigurePreprocessor, get_preprocessor
+
+logger = logging.getLogger(__name__)
+
+# Tamanho (em caracteres) dos blocos usados ao gravar/enviar o LaTeX por streaming
+STREAM_CHUNK_SIZE = 64 * 1024
 
 class LatexGeneratorV2:
     """
@@ -23,35 +36,133 @@ class LatexGeneratorV2:
     CORREÇÃO PRINCIPAL: Validação robusta de dados das figuras
     """
     
-    def __init__(self, output_dir: str = None, cache_dir: str = None):
+    def __init__(self, output_dir: str = None, cache_dir: str = None,
+                 fragment_cache: Optional[FragmentCache] = None):
         """
         Inicializa o gerador versão 2.1.
         
         Args:
             output_dir: Diretório de saída
             cache_dir: Diretório de cache
+            fragment_cache: Cache de fragmentos compartilhado (prévia incremental)
         """
-        self.output_dir = Path(output_dir) if output_dir else Path.cwd() / "output"
-        self.cache_dir = Path(cache_dir) if cache_dir else Path.cwd() / "cache"
-        self.uploads_dir = Path.cwd() / "uploads"
-        
-        # Criar diretórios
-        for dir_path in [self.output_dir, self.cache_dir, self.uploads_dir]:
-            dir_path.mkdir(exist_ok=True)
+        # Diretórios são resolvidos e criados só quando usados (ver _ensure_dirs):
+        # construir um gerador para a prévia não faz nenhuma chamada ao sistema
+        self._output_dir = output_dir
+        self._cache_dir = cache_dir
         self.document_data = {}
         self.template_type = 'basic'
-        self.sections = []
-        self.authors = []
-        self.references = []
-        self.figures = []
+        self.sections: List[Section] = []
+        self.authors: List[Author] = []
+        self.references: List[Reference] = []
+        self.figures: List[Figure] = []
+        self.tables: List[Table] = []
+        self.compile_passes = 0
+        self.fragment_cache = fragment_cache
+    
+    @property
+    def output_dir(self) -> Path:
+        """Diretório de saída"""
+        if not isinstance(self._output_dir, Path):
+            self._output_dir = Path(self._output_dir) if self._output_dir else Path.cwd() / "output"
+        return self._output_dir
+    
+    @property
+    def cache_dir(self) -> Path:
+        """Diretório de cache"""
+        if not isinstance(self._cache_dir, Path):
+            self._cache_dir = Path(self._cache_dir) if self._cache_dir else Path.cwd() / "cache"
+        return self._cache_dir
+    
+    @property
+    def builds_dir(self) -> Path:
+        """Diretório dos builds temporários (um subdiretório por compilação)"""
+        return self.cache_dir / "work"
+    
+    @property
+    def figure_preprocessor(self) -> FigurePreprocessor:
+        """Pré-processador de figuras (derivados em cache/figures)"""
+        return get_preprocessor(str(self.cache_dir / "figures"))
+    
+    @property
+    def uploads_dir(self) -> Path:
+        """Diretório de uploads"""
+        return Path.cwd() / "uploads"
+    
+    def _ensure_dirs(self):
+        """Criar os diretórios de saída e cache antes de compilar"""
+        for dir_path in [self.output_dir, self.cache_dir, self.builds_dir]:
+            dir_path.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def templates(self) -> Mapping[str, str]:
+        """Templates disponíveis (snapshot imutável do registro compartilhado)"""
+        return get_template_registry().sources
+    
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any], output_dir: str = None,
+                     cache_dir: str = None,
+                     fragment_cache: Optional[FragmentCache] = None) -> 'LatexGeneratorV2':
+        """
+        Criar gerador a partir do JSON enviado pelo frontend.
         
-        # Templates disponíveis
-        self.templates = {
-            'basic': self._get_basic_template(),
-            'ieee': self._get_ieee_template(),
-            'acm': self._get_acm_template(),
-            'abnt': self._get_abnt_template()
-        }
+        Args:
+            data: Dados do documento (template, título, autores, seções...)
+            output_dir: Diretório de saída
+            cache_dir: Diretório de cache
+            fragment_cache: Cache de fragmentos compartilhado (prévia incremental)
+        """
+        generator = cls(output_dir=output_dir, cache_dir=cache_dir, fragment_cache=fragment_cache)
+        
+        if data.get('template'):
+            generator.set_template(data['template'])
+        
+        generator.set_document_info(
+            title=data.get('title', ''),
+            abstract=data.get('abstract', ''),
+            keywords=data.get('keywords', '')
+        )
+        
+        for author in data.get('authors', []):
+            if author.get('name'):
+                generator.add_author(
+                    author['name'],
+                    author.get('affiliation', ''),
+                    author.get('email', '')
+                )
+        
+        for section in data.get('sections', []):
+            title = section.get('title', '').strip()
+            content = section.get('content', '').strip()
+            
+            if title and content:
+                generator.add_section(title, content, section.get('level', 1))
+        
+        for figure in data.get('figures', []):
+            if figure.get('path'):
+                generator.add_figure(
+                    caption=figure.get('caption', ''),
+                    label=figure.get('label', ''),
+                    filename=figure['path'],
+                    width=figure.get('width', '0.8\\textwidth')
+                )
+        
+        for table in data.get('tables', []):
+            if table.get('data'):
+                generator.add_table(table['data'], table.get('caption', ''), table.get('label', ''))
+        
+        for ref in data.get('references', []):
+            if ref.get('author') and ref.get('title'):
+                generator.add_reference(
+                    author=ref.get('author', ''),
+                    title=ref.get('title', ''),
+                    journal=ref.get('journal', ''),
+                    year=ref.get('year', ''),
+                    pages=ref.get('pages', ''),
+                    doi=ref.get('doi', '')
+                )
+        
+        return generator
     
     def set_template(self, template_type: str):
         """Definir o tipo de template"""
@@ -74,12 +185,7 @@ class LatexGeneratorV2:
     
     def add_author(self, name: str, affiliation: str = "", email: str = ""):
         """Adicionar autor ao documento"""
-        author = {
-            'name': name,
-            'affiliation': affiliation,
-            'email': email
-        }
-        self.authors.append(author)
+        self.authors.append(Author(name, affiliation, email))
     
     def clear_authors(self):
         """Limpar lista de autores"""
@@ -87,12 +193,7 @@ class LatexGeneratorV2:
     
     def add_section(self, title: str, content: str, level: int = 1):
         """Adicionar seção ao documento"""
-        section = {
-            'title': title,
-            'content': content,
-            'level': level
-        }
-        self.sections.append(section)
+        self.sections.append(Section(title, content, level))
     
     def clear_sections(self):
         """Limpar lista de seções"""
@@ -101,15 +202,7 @@ class LatexGeneratorV2:
     def add_reference(self, author: str, title: str, journal: str = "", 
                      year: str = "", pages: str = "", doi: str = ""):
         """Adicionar referência bibliográfica"""
-        reference = {
-            'author': author,
-            'title': title,
-            'journal': journal,
-            'year': year,
-            'pages': pages,
-            'doi': doi
-        }
-        self.references.append(reference)
+        self.references.append(Reference(author, title, journal, year, pages, doi))
     
     def clear_references(self):
         """Limpar lista de referências"""
@@ -122,21 +215,17 @@ class LatexGeneratorV2:
         CORREÇÃO PRINCIPAL: Validação robusta dos dados das figuras
         Detecta automaticamente se os dados estão trocados e corrige
         """
-        print(f"DEBUG: add_figure recebido - caption='{caption}', label='{label}', filename='{filename}'")
+        logger.debug("add_figure recebido - caption='%s', label='%s', filename='%s'", caption, label, filename)
         
         # CORREÇÃO: Detectar se os dados estão trocados
         corrected_caption, corrected_label, corrected_filename = self._validate_and_fix_figure_data(
             caption, label, filename
         )
         
-        figure = {
-            'caption': corrected_caption,
-            'label': corrected_label,
-            'filename': corrected_filename,
-            'width': width
-        }
+        figure = Figure(corrected_caption, corrected_label, corrected_filename, width)
         
-        print(f"DEBUG: add_figure corrigido - caption='{corrected_caption}', label='{corrected_label}', filename='{corrected_filename}'")
+        logger.debug("add_figure corrigido - caption='%s', label='%s', filename='%s'",
+                     corrected_caption, corrected_label, corrected_filename)
         
         self.figures.append(figure)
     
@@ -163,21 +252,21 @@ class LatexGeneratorV2:
         # CORREÇÃO AUTOMÁTICA DOS DADOS
         if is_caption_a_path and is_filename_empty:
             # CASO 1: Caption contém o caminho, filename está vazio
-            print(f"DEBUG: Detectado dados trocados - movendo '{caption}' de caption para filename")
+            logger.debug("Detectado dados trocados - movendo '%s' de caption para filename", caption)
             corrected_filename = caption
             corrected_caption = f"Figura {len(self.figures) + 1}"  # Caption padrão
             corrected_label = label if label else f"fig:{len(self.figures) + 1}"
             
         elif is_caption_a_path and not is_filename_empty:
             # CASO 2: Caption contém caminho E filename também tem valor
-            print(f"DEBUG: Caption parece ser caminho, mas filename também existe - usando filename")
+            logger.debug("Caption parece ser caminho, mas filename também existe - usando filename")
             corrected_filename = filename
             corrected_caption = f"Figura {len(self.figures) + 1}"
             corrected_label = label if label else f"fig:{len(self.figures) + 1}"
             
         elif not is_caption_a_path and is_filename_empty:
             # CASO 3: Caption é texto normal, mas filename está vazio
-            print(f"DEBUG: Filename vazio - gerando filename padrão")
+            logger.debug("Filename vazio - gerando filename padrão")
             corrected_filename = f"figura_{len(self.figures) + 1}.jpg"  # Filename padrão
             corrected_caption = caption if caption else f"Figura {len(self.figures) + 1}"
             corrected_label = label if label else f"fig:{len(self.figures) + 1}"
@@ -194,47 +283,136 @@ class LatexGeneratorV2:
         """Limpar lista de figuras"""
         self.figures = []
     
+    def add_table(self, data: Any, caption: str = "", label: str = ""):
+        """Adicionar tabela (lista de linhas; a primeira é o cabeçalho)"""
+        table = Table(data, caption, label)
+        if table.rows:
+            self.tables.append(table)
+    
+    def clear_tables(self):
+        """Limpar lista de tabelas"""
+        self.tables = []
+    
     def generate_latex(self) -> str:
         """
         Gerar código LaTeX completo - VERSÃO CORRIGIDA v2.1
-        """
-        template = self.templates[self.template_type]
         
-        # Substituir placeholders básicos
-        latex_code = template.replace('{{TITLE}}', self.document_data.get('title', ''))
-        latex_code = latex_code.replace('{{ABSTRACT}}', self.document_data.get('abstract', ''))
-        latex_code = latex_code.replace('{{KEYWORDS}}', self.document_data.get('keywords', ''))
+        O template compilado é renderizado em uma única passada, sem cópias
+        intermediárias do documento.
+        """
+        return self.get_compiled_template().render({
+            'TITLE': self.document_data.get('title', ''),
+            'ABSTRACT': self.document_data.get('abstract', ''),
+            'KEYWORDS': self.document_data.get('keywords', ''),
+            'AUTHORS': self._format_authors(),
+            'SECTIONS': self._format_sections(),
+            'FIGURES': self._format_figures(),
+            'REFERENCES': self._format_references()
+        })
+    
+    def get_compiled_template(self) -> CompiledTemplate:
+        """Template atual já analisado em segmentos (compilado uma vez pelo registro)"""
+        return self._get_template_entry().compiled
+    
+    def _get_template_entry(self) -> TemplateEntry:
+        """Template atual no registro (volta ao básico se ele foi removido do disco)"""
+        registry = get_template_registry()
+        return registry.get(self.template_type) or registry.get('basic')
+    
+    def iter_latex(self, chunk_size: int = 0) -> Iterator[str]:
+        """
+        Gerar o código LaTeX em partes, sem montar o documento inteiro.
         
-        # Processar autores
-        authors_latex = self._format_authors()
-        latex_code = latex_code.replace('{{AUTHORS}}', authors_latex)
+        Cada autor/seção/figura/referência é formatado apenas quando o
+        consumidor pede a próxima parte, então documentos muito grandes podem
+        ser enviados por streaming ou gravados em disco com memória constante.
         
-        # Processar seções
-        sections_latex = self._format_sections()
-        latex_code = latex_code.replace('{{SECTIONS}}', sections_latex)
+        Args:
+            chunk_size: Se > 0, agrupa as partes em blocos de ~chunk_size
+                caracteres (menos escritas em sockets/arquivos)
+        """
+        parts = self.get_compiled_template().iter_parts({
+            'TITLE': [self.document_data.get('title', '')],
+            'ABSTRACT': [self.document_data.get('abstract', '')],
+            'KEYWORDS': [self.document_data.get('keywords', '')],
+            'AUTHORS': [self._format_authors()],
+            'SECTIONS': self._interleave(self._section_fragments()),
+            'FIGURES': self._interleave(self._float_fragments()),
+            'REFERENCES': self._interleave(self._reference_fragments())
+        })
         
-        # Processar figuras - VERSÃO CORRIGIDA v2.1
-        figures_latex = self._format_figures()
-        latex_code = latex_code.replace('{{FIGURES}}', figures_latex)
+        if chunk_size <= 0:
+            yield from parts
+            return
         
-        # Processar referências
-        references_latex = self._format_references()
-        latex_code = latex_code.replace('{{REFERENCES}}', references_latex)
+        buffer = []
+        buffered = 0
+        for part in parts:
+            buffer.append(part)
+            buffered += len(part)
+            if buffered >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield ''.join(buffer)
+    
+    def generate_fragments(self) -> List[Tuple[str, str]]:
+        """
+        Gerar o documento como lista ordenada de fragmentos (id, texto).
         
-        return latex_code
+        A concatenação dos textos é o código LaTeX completo. Cada autor,
+        seção, figura e referência vira um fragmento próprio, o que permite
+        à prévia incremental devolver apenas os fragmentos que o cliente
+        ainda não conhece.
+        """
+        return [(fragment_id(text), text) for text in self.iter_latex() if text]
+    
+    @staticmethod
+    def _interleave(fragments: Iterable[str], separator: str = "\n") -> Iterator[str]:
+        """
+        Intercalar separadores entre fragmentos (equivalente a separator.join).
+
+        O separador vai junto do fragmento anterior, então cada parte
+        continua sendo uma seção/figura/tabela/referência inteira.
+        """
+        previous = None
+        for fragment in fragments:
+            if previous is not None:
+                yield previous + separator
+            previous = fragment
+        if previous is not None:
+            yield previous
+    
+    def _cached_fragment(self, kind: str, data, render) -> str:
+        """
+        Renderizar fragmento consultando o cache de fragmentos, se houver.
+
+        ``data`` é uma função que devolve a chave do fragmento, chamada só
+        quando há cache (sem ele, montar a chave seria trabalho perdido).
+        """
+        if self.fragment_cache is None:
+            return render()
+        return self.fragment_cache.get_or_render(kind, data(), render)
     
     def _format_authors(self) -> str:
         """Formatar autores para LaTeX"""
         if not self.authors:
             return ""
         
+        return self._cached_fragment(
+            'authors', lambda: [author.as_tuple() for author in self.authors], self._render_authors
+        )
+    
+    def _render_authors(self) -> str:
+        """Renderizar a lista de autores (sem cache)"""
         authors_list = []
         for author in self.authors:
-            author_str = author['name']
-            if author.get('affiliation'):
-                author_str += f"\\\\{author['affiliation']}"
-            if author.get('email'):
-                author_str += f"\\\\\\texttt{{{author['email']}}}"
+            author_str = author.name
+            if author.affiliation:
+                author_str += f"\\\\{author.affiliation}"
+            if author.email:
+                author_str += f"\\\\\\texttt{{{author.email}}}"
             authors_list.append(author_str)
         
         return " \\and ".join(authors_list)
@@ -243,34 +421,39 @@ class LatexGeneratorV2:
         """
         Formatar seções para LaTeX - VERSÃO CORRIGIDA
         """
-        if not self.sections:
-            return ""
+        return "\n".join(self._section_fragments())
+    
+    def _section_fragments(self) -> Iterator[str]:
+        """Fragmentos LaTeX de cada seção válida"""
+        sections = [section for section in self.sections if section.title and section.content]
+        if self.fragment_cache is None:
+            # Caminho mais comum (compilação): sem chave de cache nem closures por seção
+            yield from map(self._format_section, sections)
+            return
         
-        sections_latex = []
+        for section in sections:
+            yield self._cached_fragment(
+                'section', section.as_tuple, lambda: self._format_section(section)
+            )
+    
+    def _format_section(self, section: Section) -> str:
+        """Formatar uma seção para LaTeX"""
+        title = section.title
+        content = section.content
+        level = section.level
         
-        for i, section in enumerate(self.sections):
-            if not section.get('title') or not section.get('content'):
-                continue  # Pular seções vazias
-                
-            title = section['title'].strip()
-            content = section['content'].strip()
-            level = section.get('level', 1)
-            
-            # Determinar comando de seção baseado no nível
-            if level == 1:
-                section_cmd = "\\section"
-            elif level == 2:
-                section_cmd = "\\subsection"
-            elif level == 3:
-                section_cmd = "\\subsubsection"
-            else:
-                section_cmd = "\\paragraph"
-            
-            # Formatar seção
-            section_latex = f"{section_cmd}{{{title}}}\n{content}\n"
-            sections_latex.append(section_latex)
+        # Determinar comando de seção baseado no nível
+        if level == 1:
+            section_cmd = "\\section"
+        elif level == 2:
+            section_cmd = "\\subsection"
+        elif level == 3:
+            section_cmd = "\\subsubsection"
+        else:
+            section_cmd = "\\paragraph"
         
-        return "\n".join(sections_latex)
+        # Formatar seção
+        return f"{section_cmd}{{{title}}}\n{content}\n"
     
     def _format_figures(self) -> str:
         """
@@ -278,42 +461,56 @@ class LatexGeneratorV2:
         
         CORREÇÃO PRINCIPAL: Validação robusta e tratamento de erros
         """
-        if not self.figures:
+        if not self.figures and not self.tables:
             return ""
         
-        figures_latex = []
+        result = "\n".join(self._float_fragments())
+        logger.debug("_format_figures resultado final:\n%s", result)
+        return result
+    
+    def _float_fragments(self) -> Iterator[str]:
+        """Figuras seguidas das tabelas (os templates têm um único bloco de floats)"""
+        return itertools.chain(self._figure_fragments(), self._table_fragments())
+    
+    def _figure_fragments(self) -> Iterator[str]:
+        """Fragmentos LaTeX de cada figura válida"""
         for i, figure in enumerate(self.figures):
-            try:
-                # Extrair dados da figura com validação
-                raw_filename = figure.get('filename', '')
-                raw_caption = figure.get('caption', '')
-                raw_label = figure.get('label', '')
-                
-                print(f"DEBUG: _format_figures processando figura {i+1}:")
-                print(f"  - raw_filename: '{raw_filename}'")
-                print(f"  - raw_caption: '{raw_caption}'")
-                print(f"  - raw_label: '{raw_label}'")
-                
-                # VALIDAÇÃO ADICIONAL: Se ainda há problemas, corrigir aqui
-                if not raw_filename or raw_filename.strip() == "":
-                    print(f"DEBUG: Filename vazio na figura {i+1}, pulando...")
-                    continue
-                
-                # Extrair apenas o nome do arquivo (sem caminho)
-                filename = Path(raw_filename).name
-                
-                # Garantir que temos valores válidos
-                caption = raw_caption if raw_caption and not ('/' in raw_caption or '\\' in raw_caption) else f"Figura {i+1}"
-                label = raw_label if raw_label else f"fig:{i+1}"
-                width = figure.get('width', '0.8\\textwidth')
-                
-                print(f"DEBUG: _format_figures dados finais:")
-                print(f"  - filename: '{filename}'")
-                print(f"  - caption: '{caption}'")
-                print(f"  - label: '{label}'")
-                
-                # Gerar código LaTeX da figura
-                figure_latex = f"""
+            # A posição entra na chave: caption/label padrão dependem dela
+            figure_latex = self._cached_fragment(
+                'figure', lambda: [i, figure.as_tuple()], lambda: self._format_figure(i, figure)
+            )
+            if figure_latex:
+                yield figure_latex
+    
+    def _format_figure(self, i: int, figure: Figure) -> str:
+        """Formatar uma figura para LaTeX (string vazia se inválida)"""
+        try:
+            # Extrair dados da figura com validação
+            raw_filename = figure.filename
+            raw_caption = figure.caption
+            raw_label = figure.label
+            
+            logger.debug("_format_figures processando figura %d: raw_filename='%s', raw_caption='%s', raw_label='%s'",
+                         i + 1, raw_filename, raw_caption, raw_label)
+            
+            # VALIDAÇÃO ADICIONAL: Se ainda há problemas, corrigir aqui
+            if not raw_filename:
+                logger.debug("Filename vazio na figura %d, pulando...", i + 1)
+                return ""
+            
+            # Extrair apenas o nome do arquivo (sem caminho)
+            filename = Path(raw_filename).name
+            
+            # Garantir que temos valores válidos
+            caption = raw_caption if raw_caption and not ('/' in raw_caption or '\\' in raw_caption) else f"Figura {i+1}"
+            label = raw_label if raw_label else f"fig:{i+1}"
+            width = figure.width
+            
+            logger.debug("_format_figures dados finais: filename='%s', caption='%s', label='%s'",
+                         filename, caption, label)
+            
+            # Gerar código LaTeX da figura
+            return f"""
 \\begin{{figure}}[H]
 \\centering
 \\includegraphics[width={width}]{{{filename}}}
@@ -321,199 +518,75 @@ class LatexGeneratorV2:
 \\label{{{label}}}
 \\end{{figure}}
 """
-                figures_latex.append(figure_latex)
-                
-            except Exception as e:
-                print(f"DEBUG: Erro ao processar figura {i+1}: {e}")
-                continue
-        
-        result = "\n".join(figures_latex)
-        print(f"DEBUG: _format_figures resultado final:\n{result}")
-        return result
+            
+        except Exception as e:
+            logger.warning("Erro ao processar figura %d: %s", i + 1, e)
+            return ""
+    
+    def _table_fragments(self) -> Iterator[str]:
+        """Fragmentos LaTeX de cada tabela"""
+        for i, table in enumerate(self.tables):
+            yield self._cached_fragment(
+                'table', lambda: [i, table.as_tuple()], lambda: self._format_table(i, table)
+            )
+    
+    def _format_table(self, i: int, table: Table) -> str:
+        """Formatar uma tabela como tabular (linhas curtas são completadas)"""
+        columns = max(len(row) for row in table.rows)
+        lines = [" & ".join(row + ("",) * (columns - len(row))) + " \\\\" for row in table.rows]
+        header, body = lines[0], lines[1:]
+        caption = table.caption or f"Tabela {i+1}"
+        label = table.label or f"tab:{i+1}"
+        rows = "\n".join([header, "\\hline"] + body) if body else header
+        return f"""
+\\begin{{table}}[H]
+\\centering
+\\caption{{{caption}}}
+\\label{{{label}}}
+\\begin{{tabular}}{{|{'l|' * columns}}}
+\\hline
+{rows}
+\\hline
+\\end{{tabular}}
+\\end{{table}}
+"""
     
     def _format_references(self) -> str:
         """Formatar referências para LaTeX"""
-        if not self.references:
-            return ""
-        
-        references_latex = []
+        return "\n".join(self._reference_fragments())
+    
+    def _reference_fragments(self) -> Iterator[str]:
+        """Fragmentos LaTeX de cada referência"""
         for i, ref in enumerate(self.references, 1):
-            ref_str = f"\\bibitem{{ref{i}}} "
-            
-            if ref.get('author'):
-                ref_str += f"{ref['author']}. "
+            yield self._cached_fragment(
+                'reference', lambda: [i, ref.as_tuple()], lambda: self._format_reference(i, ref)
+            )
+    
+    def _format_reference(self, i: int, ref: Reference) -> str:
+        """Formatar uma referência como \\bibitem"""
+        ref_str = f"\\bibitem{{ref{i}}} "
+        
+        if ref.author:
+            ref_str += f"{ref.author}. "
+        
+        if ref.title:
+            ref_str += f"\\textit{{{ref.title}}}. "
+        
+        if ref.journal:
+            ref_str += f"{ref.journal}"
             
-            if ref.get('title'):
-                ref_str += f"\\textit{{{ref['title']}}}. "
+        if ref.year:
+            ref_str += f", {ref.year}"
             
-            if ref.get('journal'):
-                ref_str += f"{ref['journal']}"
-                
-            if ref.get('year'):
-                ref_str += f", {ref['year']}"
-                
-            if ref.get('pages'):
-                ref_str += f", pp. {ref['pages']}"
-                
-            if ref.get('doi'):
-                ref_str += f". DOI: {ref['doi']}"
+        if ref.pages:
+            ref_str += f", pp. {ref.pages}"
             
-            ref_str += "."
-            references_latex.append(ref_str)
-        
-        return "\n".join(references_latex)
-    
-    def _get_basic_template(self) -> str:
-        """Template básico LaTeX"""
-        return """\\documentclass[12pt,a4paper]{article}
-\\usepackage[utf8]{inputenc}
-\\usepackage[T1]{fontenc}
-\\usepackage{geometry}
-\\usepackage{amsmath}
-\\usepackage{amsfonts}
-\\usepackage{amssymb}
-\\usepackage{graphicx}
-\\usepackage{cite}
-\\usepackage{url}
-\\usepackage{hyperref}
-\\usepackage{float}
-
-\\geometry{margin=2.5cm}
-
-\\title{{{TITLE}}}
-\\author{{{AUTHORS}}}
-\\date{\\today}
-
-\\begin{document}
-
-\\maketitle
-
-\\begin{abstract}
-{{ABSTRACT}}
-\\end{abstract}
-
-\\textbf{Palavras-chave:} {{KEYWORDS}}
-
-{{SECTIONS}}
-
-{{FIGURES}}
-
-\\begin{thebibliography}{99}
-{{REFERENCES}}
-\\end{thebibliography}
-
-\\end{document}"""
-    
-    def _get_ieee_template(self) -> str:
-        """Template IEEE LaTeX (usando classe padrão)"""
-        return """\\documentclass[10pt,twocolumn]{article}
-\\usepackage[utf8]{inputenc}
-\\usepackage[margin=2cm]{geometry}
-\\usepackage{amsmath,amssymb,amsfonts}
-\\usepackage{graphicx}
-\\usepackage{textcomp}
-\\usepackage{xcolor}
-\\usepackage{cite}
-\\usepackage{float}
-
-\\title{{{TITLE}}}
-\\author{{{AUTHORS}}}
-\\date{{}}
-
-\\begin{document}
-
-\\maketitle
-
-\\begin{abstract}
-{{ABSTRACT}}
-\\end{abstract}
-
-\\textbf{Index Terms---}{{KEYWORDS}}
-
-{{SECTIONS}}
-
-{{FIGURES}}
-
-\\begin{thebibliography}{1}
-{{REFERENCES}}
-\\end{thebibliography}
-
-\\end{document}"""
-    
-    def _get_acm_template(self) -> str:
-        """Template ACM LaTeX (usando classe padrão)"""
-        return """\\documentclass[11pt]{article}
-\\usepackage[utf8]{inputenc}
-\\usepackage[margin=2.5cm]{geometry}
-\\usepackage{amsmath,amssymb,amsfonts}
-\\usepackage{graphicx}
-\\usepackage{cite}
-\\usepackage{url}
-\\usepackage{float}
-
-\\title{{{TITLE}}}
-\\author{{{AUTHORS}}}
-\\date{{}}
-
-\\begin{document}
-
-\\maketitle
-
-\\begin{abstract}
-{{ABSTRACT}}
-\\end{abstract}
-
-\\textbf{Keywords:} {{KEYWORDS}}
-
-{{SECTIONS}}
-
-{{FIGURES}}
-
-\\begin{thebibliography}{1}
-{{REFERENCES}}
-\\end{thebibliography}
-
-\\end{document}"""
-    
-    def _get_abnt_template(self) -> str:
-        """Template ABNT LaTeX (usando classe padrão)"""
-        return """\\documentclass[12pt,a4paper]{article}
-\\usepackage[utf8]{inputenc}
-\\usepackage[brazil]{babel}
-\\usepackage[T1]{fontenc}
-\\usepackage[margin=3cm]{geometry}
-\\usepackage{amsmath}
-\\usepackage{amsfonts}
-\\usepackage{amssymb}
-\\usepackage{graphicx}
-\\usepackage{cite}
-\\usepackage{indentfirst}
-\\usepackage{float}
-
-\\title{{{TITLE}}}
-\\author{{{AUTHORS}}}
-\\date{\\today}
-
-\\begin{document}
-
-\\maketitle
-
-\\begin{abstract}
-{{ABSTRACT}}
-
-\\textbf{Palavras-chave:} {{KEYWORDS}}
-\\end{abstract}
-
-{{SECTIONS}}
-
-{{FIGURES}}
-
-\\begin{thebibliography}{1}
-{{REFERENCES}}
-\\end{thebibliography}
-
-\\end{document}"""
-
+        if ref.doi:
+            ref_str += f". DOI: {ref.doi}"
+        
+        ref_str += "."
+        return ref_str
+    
     def get_debug_info(self) -> Dict[str, Any]:
         """Obter informações de debug"""
         return {
@@ -522,90 +595,129 @@ class LatexGeneratorV2:
             'sections_count': len(self.sections),
             'references_count': len(self.references),
             'figures_count': len(self.figures),
-            'sections_processed': len([s for s in self.sections if s.get('title') and s.get('content')]),
+            'tables_count': len(self.tables),
+            'sections_processed': len([s for s in self.sections if s.title and s.content]),
             'sections_received': len(self.sections)
         }
 
-    def _copy_figures_to_output(self) -> List[str]:
-        """Copiar figuras para o diretório de output e retornar lista de nomes"""
+    def _stage_figures(self, build_dir: Path) -> List[str]:
+        """
+        Disponibilizar figuras no diretório do build e retornar lista de nomes.
+
+        Usa o derivado pré-processado de cada figura (ver ``image_pipeline``)
+        e hardlink/symlink quando possível (ver ``figure_store.link_file``),
+        então figuras do store não são copiadas a cada compilação. Figuras
+        diferentes com o mesmo nome recebem um prefixo com a posição.
+        """
         copied_files = []
+        staged: Dict[str, Path] = {}
+        preprocessor = self.figure_preprocessor
         
-        for figure in self.figures:
-            source_path = Path(figure['filename'])
+        for i, figure in enumerate(self.figures):
+            source_path = Path(figure.filename)
             
             if source_path.exists():
+                # Derivado convertido/reduzido (a extensão pode mudar, ex. .gif -> .png)
+                staged_path = preprocessor.resolve(source_path).resolve()
+                
                 # Criar nome seguro para o arquivo (sem espaços)
-                safe_name = source_path.name.replace(' ', '_')
-                dest_path = self.output_dir / safe_name
+                safe_name = f"{source_path.stem}{staged_path.suffix}".replace(' ', '_')
+                if safe_name in staged and staged[safe_name] != staged_path:
+                    safe_name = f"{i + 1}_{safe_name}"
+                dest_path = build_dir / safe_name
                 
                 try:
-                    shutil.copy2(source_path, dest_path)
+                    method = link_file(staged_path, dest_path)
+                    logger.debug("Figura %s disponibilizada via %s", safe_name, method)
+                    staged[safe_name] = staged_path
                     copied_files.append(safe_name)
                     # Atualizar o filename na figura para usar o nome seguro
-                    figure['filename'] = safe_name
+                    figure.filename = safe_name
                 except Exception as e:
-                    print(f"Erro ao copiar figura {source_path}: {e}")
+                    logger.warning("Erro ao copiar figura %s: %s", source_path, e)
             else:
-                print(f"Arquivo de figura não encontrado: {source_path}")
+                logger.warning("Arquivo de figura não encontrado: %s", source_path)
         
         return copied_files
 
     def compile_to_pdf(self, output_name: str = "document") -> Tuple[bool, str, Dict[str, Path]]:
-        """Compila o documento para PDF."""
+        """
+        Compila o documento para PDF.
+        
+        A compilação roda em um diretório temporário próprio (em
+        ``builds_dir``), então .aux/.log e figuras de compilações concorrentes
+        não colidem; apenas o .tex e o PDF finais são movidos para
+        ``output_dir``.
+        """
+        build_dir = None
         try:
-            # Copiar figuras para o diretório de output
-            copied_figures = self._copy_figures_to_output()
+            self._ensure_dirs()
+            build_dir = Path(tempfile.mkdtemp(prefix=f"{output_name}_", dir=str(self.builds_dir)))
             
-            # Gerar código LaTeX
-            latex_code = self.generate_latex()
+            # Disponibilizar figuras no diretório do build
+            copied_figures = self._stage_figures(build_dir)
             
-            # Criar arquivo LaTeX temporário
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.tex', delete=False, encoding='utf-8') as f:
-                f.write(latex_code)
-                tex_file = f.name
+            # Compilar com o preâmbulo pré-compilado do template (quando disponível);
+            # o .tex é gravado a partir de iter_latex, sem montar o documento em memória
+            template = self._get_template_entry()
+            compiler = get_compiler(str(self.cache_dir / "formats"))
+            success, message, self.compile_passes = compiler.compile(
+                self.iter_latex(chunk_size=STREAM_CHUNK_SIZE),
+                template.name,
+                template.source,
+                build_dir,
+                output_name
+            )
             
-            try:
-                # Compilar com pdflatex
-                result = subprocess.run([
-                    'pdflatex', 
-                    '-interaction=nonstopmode',
-                    '-output-directory', str(self.output_dir),
-                    tex_file
-                ], capture_output=True, text=True, timeout=30)
-                
-                # Verificar se PDF foi gerado
-                pdf_name = Path(tex_file).stem + '.pdf'
-                pdf_path = self.output_dir / pdf_name
-                
-                if pdf_path.exists():
-                    # Renomear para o nome desejado
-                    final_pdf = self.output_dir / f"{output_name}.pdf"
-                    final_tex = self.output_dir / f"{output_name}.tex"
-                    
-                    shutil.move(str(pdf_path), str(final_pdf))
-                    shutil.copy2(tex_file, str(final_tex))
-                    
-                    return True, f"PDF gerado com sucesso. Figuras copiadas: {len(copied_figures)}", {
-                        'latex': final_tex,
-                        'pdf': final_pdf
-                    }
-                else:
-                    return False, f"Erro na compilação: {result.stderr}", {}
-                    
-            except subprocess.TimeoutExpired:
-                return False, "Timeout na compilação do PDF", {}
-            finally:
-                # Limpar arquivo temporário
-                try:
-                    os.unlink(tex_file)
-                except:
-                    pass
+            if success:
+                files = {}
+                for kind, extension in (('latex', '.tex'), ('pdf', '.pdf')):
+                    files[kind] = self.output_dir / f"{output_name}{extension}"
+                    shutil.move(str(build_dir / f"{output_name}{extension}"), str(files[kind]))
+                return True, f"{message}. Figuras copiadas: {len(copied_figures)}", files
+            else:
+                return False, message, {}
                     
         except Exception as e:
             return False, f"Erro inesperado: {str(e)}", {}
+        finally:
+            if build_dir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+    
+    def get_build_key(self) -> str:
+        """
+        Gera a chave do cache de compilação.
+        
+        Combina o template, o código LaTeX gerado e o hash do conteúdo de
+        cada figura referenciada, de forma que trocar uma imagem mantendo
+        o mesmo nome de arquivo invalida a entrada.
+        """
+        digest = hashlib.sha256(self.template_type.encode('utf-8'))
+        
+        # O LaTeX é consumido em blocos: o documento não é materializado
+        for chunk in self.iter_latex(chunk_size=STREAM_CHUNK_SIZE):
+            digest.update(chunk.encode('utf-8'))
+        
+        # Parâmetros do pré-processamento: alterá-los muda os derivados incluídos no PDF
+        if self.figures:
+            digest.update(f"\0figures:{self.figure_preprocessor.params_tag}".encode('utf-8'))
+        
+        for figure in self.figures:
+            source_path = Path(figure.filename)
+            if source_path.is_file():
+                figure_hash = self._get_file_hash(source_path)
+            else:
+                figure_hash = f"missing:{figure.filename}"
+            digest.update(f"\0{figure_hash}".encode('utf-8'))
+        
+        return digest.hexdigest()
+    
+    def _get_file_hash(self, path: Path) -> str:
+        """Calcula o hash SHA-256 do conteúdo de um arquivo (blobs do store usam o nome)."""
+        return file_digest(path)
     
     def _get_cache_key(self, content: str) -> str:
         """Gera chave de cache baseada no conteúdo."""
-        return hashlib.md5(content.encode('utf-8')).hexdigest()[:16]
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuração de logging do LaTeX Generator
+Níveis por módulo ajustáveis em tempo de execução, formatação preguiçosa e amostragem
+"""
+
+import os
+import json
+import time
+import random
+import logging
+from typing import Any, Dict, Optional
+
+# Logger das rotas quentes (/api/preview), sujeito a amostragem
+PREVIEW_LOGGER = 'app.preview'
+
+
+class LazyJSON:
+    """
+    Serializa o objeto em JSON apenas se o registro de log for emitido.
+
+    Uso: ``logger.debug("Dados: %s", LazyJSON(data))`` — com o nível acima
+    de DEBUG, ``json.dumps`` nunca é chamado.
+    """
+
+    __slots__ = ('obj', 'indent')
+
+    def __init__(self, obj: Any, indent: Optional[int] = None):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self):
+        return json.dumps(self.obj, indent=self.indent, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar apenas uma fração dos registros abaixo de WARNING"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro (campos extras via ``extra={...}``)"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Converte ``"app=DEBUG,latex_generator_v2=WARNING"`` em dicionário"""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def set_levels(levels: Dict[str, str]) -> Dict[str, str]:
+    """
+    Ajusta níveis por logger em tempo de execução.
+
+    Use ``"root"`` para o nível global. Levanta ``ValueError`` para nomes de
+    nível inválidos.
+    """
+    for name, level in levels.items():
+        if not isinstance(logging.getLevelName(str(level).upper()), int):
+            raise ValueError(f"Nível de log inválido: {level}")
+
+    for name, level in levels.items():
+        logger = logging.getLogger() if name == 'root' else logging.getLogger(name)
+        logger.setLevel(str(level).upper())
+
+    return get_levels()
+
+
+def get_levels() -> Dict[str, str]:
+    """Níveis configurados explicitamente (root e loggers nomeados)"""
+    levels = {'root': logging.getLevelName(logging.getLogger().level)}
+    for name, logger in logging.Logger.manager.loggerDict.items():
+        if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(logger.level)
+    return levels
+
+
+def configure_logging():
+    """
+    Configura o logging a partir do ambiente:
+
+    - ``LOG_LEVEL``: nível global (padrão INFO)
+    - ``LOG_LEVELS``: níveis por módulo, ex. ``app=DEBUG,compile_jobs=WARNING``
+    - ``LOG_FORMAT``: ``text`` (padrão) ou ``json``
+    - ``LOG_SAMPLE_PREVIEW``: fração dos logs DEBUG/INFO de /api/preview mantidos
+    """
+    handler = logging.StreamHandler()
+    if os.environ.get('LOG_FORMAT', 'text').lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+    set_levels(parse_levels(os.environ.get('LOG_LEVELS', '')))
+
+    sample_rate = float(os.environ.get('LOG_SAMPLE_PREVIEW', '1.0'))
+    preview_logger = logging.getLogger(PREVIEW_LOGGER)
+    preview_logger.filters = [f for f in preview_logger.filters if not isinstance(f, SamplingFilter)]
+    if sample_rate < 1.0:
+        preview_logger.addFilter(SamplingFilter(sample_rate))
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Projetos salvos (documentos do editor) em SQLite
+O documento é salvo uma vez; depois o cliente envia só os campos e itens (seções, figuras...) alterados, por id
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Listas do documento cujos itens recebem id e podem ser alterados individualmente
+COLLECTIONS = ('sections', 'figures', 'tables', 'authors', 'references')
+
+
+class ProjectNotFoundError(Exception):
+    """Projeto inexistente"""
+
+
+class VersionConflictError(Exception):
+    """O projeto mudou desde a versão em que o patch foi baseado"""
+
+    def __init__(self, message: str, current_version: int):
+        super().__init__(message)
+        self.current_version = current_version
+
+
+class InvalidPatchError(ValueError):
+    """Patch malformado (ids desconhecidos, ordem incompleta, tipos errados)"""
+
+
+def new_item_id() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+def _with_ids(items: Any, kind: str) -> List[Dict[str, Any]]:
+    """Cópia da lista com ``id`` em todos os itens (ids ausentes são gerados)"""
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise InvalidPatchError(f'"{kind}" deve ser uma lista de objetos')
+    result, seen = [], set()
+    for item in items:
+        item_id = str(item.get('id') or new_item_id())
+        if item_id in seen:
+            raise InvalidPatchError(f'id repetido em "{kind}": {item_id}')
+        seen.add(item_id)
+        result.append({**item, 'id': item_id})
+    return result
+
+
+def apply_patch(document: Dict[str, Any], patch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Aplica um patch ao documento, sem modificá-lo.
+
+    Campos simples (``title``, ``abstract``, ``template``...) são
+    substituídos (``null`` remove). Em uma coleção, uma lista substitui a
+    coleção inteira; um objeto altera itens por id::
+
+        {"sections": {"upsert": [{"id": "a1b2c3d4", "content": "..."},
+                                 {"title": "Nova seção", "content": "..."}],
+                      "delete": ["e5f6a7b8"],
+                      "order": ["a1b2c3d4", ...]}}
+
+    ``upsert`` mescla os campos em um item existente ou acrescenta um novo
+    (com id gerado, se ausente). ``order``, se presente, deve listar todos os
+    ids da coleção.
+
+    Returns:
+        (documento novo, alterações: campos simples e itens gravados/removidos por coleção)
+    """
+    if not isinstance(patch, dict):
+        raise InvalidPatchError('O patch deve ser um objeto')
+
+    result = dict(document)
+    changes: Dict[str, Any] = {'fields': [], 'items': {}, 'deleted': {}}
+
+    for key, value in patch.items():
+        if key == 'id':
+            continue
+        if key not in COLLECTIONS:
+            if value is None:
+                result.pop(key, None)
+            else:
+                result[key] = value
+            changes['fields'].append(key)
+            continue
+
+        current = result.get(key, [])
+        if isinstance(value, list):
+            items = _with_ids(value, key)
+            changes['deleted'][key] = [item['id'] for item in current]
+            changes['items'][key] = items
+            result[key] = items
+            continue
+        if not isinstance(value, dict):
+            raise InvalidPatchError(f'"{key}" deve ser uma lista ou um objeto com upsert/delete/order')
+
+        by_id = OrderedDict((item['id'], item) for item in current)
+        written = []
+        for item in _with_ids(value.get('upsert', []), key):
+            merged = {**by_id[item['id']], **item} if item['id'] in by_id else item
+            by_id[item['id']] = merged
+            written.append(merged)
+
+        deleted = [str(item_id) for item_id in value.get('delete', [])]
+        for item_id in deleted:
+            if item_id not in by_id:
+                raise InvalidPatchError(f'Item inexistente em "{key}": {item_id}')
+            del by_id[item_id]
+
+        order = value.get('order')
+        if order is not None:
+            order = [str(item_id) for item_id in order]
+            if sorted(order) != sorted(by_id):
+                raise InvalidPatchError(f'"order" de "{key}" deve listar todos os ids da coleção')
+            by_id = OrderedDict((item_id, by_id[item_id]) for item_id in order)
+
+        result[key] = list(by_id.values())
+        changes['items'][key] = [item for item in written if item['id'] in by_id]
+        changes['deleted'][key] = deleted
+
+    return result, changes
+
+
+class ProjectStore:
+    """
+    Projetos em SQLite (``database/app.db``, junto da tabela ``user``), um registro por item.
+
+    Campos simples e a ordem dos itens ficam em ``projects``; cada seção,
+    figura, tabela, autor e referência é uma linha de ``project_items``, de
+    forma que um patch grava só o que mudou. Os documentos montados ficam em
+    memória (LRU) por versão; outro processo que altere o projeto incrementa
+    a versão e invalida a cópia.
+    """
+
+    def __init__(self, db_path: str, cache_entries: int = 64):
+        """
+        Inicializa o store.
+
+        Args:
+            db_path: Arquivo SQLite
+            cache_entries: Documentos montados mantidos em memória
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, timeout=5, isolation_level=None)
+        self._lock = threading.Lock()
+        self.cache_entries = cache_entries
+        self._documents: 'OrderedDict[str, Tuple[int, Dict[str, Any]]]' = OrderedDict()
+
+        with self._lock:
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS projects ('
+                'id TEXT PRIMARY KEY, version INTEGER NOT NULL, fields TEXT NOT NULL, '
+                'created REAL NOT NULL, updated REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS project_items ('
+                'project_id TEXT NOT NULL, kind TEXT NOT NULL, item_id TEXT NOT NULL, data TEXT NOT NULL, '
+                'PRIMARY KEY (project_id, kind, item_id));'
+            )
+
+    def create(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Salva um novo projeto e retorna ``project_id``, ``version`` e os ids dos itens"""
+        if not isinstance(document, dict):
+            raise InvalidPatchError('O documento deve ser um objeto')
+        project_id = uuid.uuid4().hex
+        fields = {key: value for key, value in document.items() if key not in COLLECTIONS and key != 'id'}
+        collections = {kind: _with_ids(document.get(kind, []), kind) for kind in COLLECTIONS}
+        now = time.time()
+
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute('INSERT INTO projects VALUES (?, 1, ?, ?, ?)',
+                                 (project_id, self._dump_fields(fields, collections), now, now))
+                self._write_items(project_id, collections)
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._remember(project_id, 1, {**fields, **collections})
+
+        return self._describe(project_id, 1, {**fields, **collections})
+
+    def load(self, project_id: str) -> Dict[str, Any]:
+        """Projeto completo: ``project_id``, ``version``, ``document`` e ids dos itens"""
+        with self._lock:
+            version, document = self._read(project_id)
+        return {**self._describe(project_id, version, document), 'document': document}
+
+    def update(self, project_id: str, patch: Dict[str, Any], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Aplica um patch (ver ``apply_patch``) e grava só o que mudou.
+
+        Args:
+            project_id: Projeto
+            patch: Campos e itens alterados
+            base_version: Versão em que o cliente baseou o patch; se o projeto
+                estiver em outra, levanta ``VersionConflictError``
+
+        Returns:
+            Mesmo formato de ``load`` (documento já com o patch)
+        """
+        if base_version is not None:
+            if isinstance(base_version, bool) or not isinstance(base_version, (int, str)) \
+                    or not str(base_version).strip().isdigit():
+                raise InvalidPatchError('"base_version" deve ser um número inteiro')
+            base_version = int(base_version)
+
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                version, document = self._read(project_id)
+                if base_version is not None and base_version != version:
+                    raise VersionConflictError(
+                        f'Projeto alterado (versão atual {version}, patch baseado na {base_version})', version
+                    )
+                if not patch:
+                    self._db.execute('COMMIT')
+                    return {**self._describe(project_id, version, document), 'document': document}
+
+                document, changes = apply_patch(document, patch)
+                version += 1
+                fields = {key: value for key, value in document.items() if key not in COLLECTIONS}
+                self._db.execute('UPDATE projects SET version = ?, fields = ?, updated = ? WHERE id = ?',
+                                 (version, self._dump_fields(fields, document), time.time(), project_id))
+                for kind, item_ids in changes['deleted'].items():
+                    self._db.executemany(
+                        'DELETE FROM project_items WHERE project_id = ? AND kind = ? AND item_id = ?',
+                        [(project_id, kind, item_id) for item_id in item_ids]
+                    )
+                self._write_items(project_id, changes['items'])
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._remember(project_id, version, document)
+
+        return {**self._describe(project_id, version, document), 'document': document}
+
+    def _read(self, project_id: str) -> Tuple[int, Dict[str, Any]]:
+        """Versão e documento (da memória, se a versão ainda for a do banco)"""
+        row = self._db.execute('SELECT version, fields FROM projects WHERE id = ?', (project_id,)).fetchone()
+        if row is None:
+            raise ProjectNotFoundError(f'Projeto não encontrado: {project_id}')
+        version = row[0]
+
+        cached = self._documents.get(project_id)
+        if cached is not None and cached[0] == version:
+            self._documents.move_to_end(project_id)
+            return cached
+
+        stored = json.loads(row[1])
+        items: Dict[Tuple[str, str], Dict[str, Any]] = {
+            (kind, item_id): json.loads(data)
+            for kind, item_id, data in self._db.execute(
+                'SELECT kind, item_id, data FROM project_items WHERE project_id = ?', (project_id,)
+            )
+        }
+        document = dict(stored['fields'])
+        for kind, item_ids in stored['order'].items():
+            document[kind] = [items[(kind, item_id)] for item_id in item_ids]
+        self._remember(project_id, version, document)
+        return version, document
+
+    def _write_items(self, project_id: str, collections: Dict[str, List[Dict[str, Any]]]):
+        self._db.executemany(
+            'INSERT OR REPLACE INTO project_items VALUES (?, ?, ?, ?)',
+            [(project_id, kind, item['id'], json.dumps(item, ensure_ascii=False))
+             for kind, items in collections.items() for item in items]
+        )
+
+    @staticmethod
+    def _dump_fields(fields: Dict[str, Any], collections: Dict[str, Any]) -> str:
+        order = {kind: [item['id'] for item in collections.get(kind, [])] for kind in COLLECTIONS}
+        return json.dumps({'fields': fields, 'order': order}, ensure_ascii=False)
+
+    def _remember(self, project_id: str, version: int, document: Dict[str, Any]):
+        self._documents[project_id] = (version, document)
+        self._documents.move_to_end(project_id)
+        while len(self._documents) > self.cache_entries:
+            self._documents.popitem(last=False)
+
+    @staticmethod
+    def _describe(project_id: str, version: int, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'project_id': project_id,
+            'version': version,
+            'item_ids': {kind: [item['id'] for item in document.get(kind, [])] for kind in COLLECTIONS}
+        }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limites de uso por cliente
+Token bucket (requisições por período, com rajada) e limite de operações simultâneas, em memória ou em SQLite
+"""
+
+import re
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+PERIODS = {'s': 1, 'sec': 1, 'min': 60, 'h': 3600, 'hour': 3600}
+
+
+class Quota(NamedTuple):
+    """Cota de um grupo de rotas: ``rate`` tokens/s, rajada de ``burst`` e ``max_concurrent`` simultâneas"""
+    rate: float
+    burst: int
+    max_concurrent: int
+
+
+class Decision(NamedTuple):
+    """Resultado da verificação de cota (valores usados nos headers X-RateLimit-*)"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+    concurrent_limit: int
+    reason: Optional[str] = None
+
+
+def parse_quota(spec: str) -> Quota:
+    """
+    Lê uma cota no formato ``<n>/<período>[,rajada[,simultâneas]]``.
+
+    Ex.: ``"6/min,3,2"`` = 6 requisições por minuto, rajada de 3 e no máximo
+    2 em andamento por cliente. Sem rajada, ``n``; sem simultâneas, sem limite (0).
+    """
+    match = re.fullmatch(r'\s*([\d.]+)\s*/\s*(\w+)\s*(?:,\s*(\d+)\s*)?(?:,\s*(\d+)\s*)?', spec)
+    if not match or match.group(2) not in PERIODS:
+        raise ValueError(f"Cota inválida: {spec!r} (ex.: '6/min,3,2')")
+    count = float(match.group(1))
+    burst = int(match.group(3) or max(1, int(count)))
+    return Quota(count / PERIODS[match.group(2)], burst, int(match.group(4) or 0))
+
+
+class MemoryBackend:
+    """Estado dos limites na memória do processo (um servidor, ou limites por worker)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: int, now: float) -> Tuple[bool, float]:
+        """Consome ``cost`` tokens se houver; retorna (permitido, tokens restantes)"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed, tokens
+
+    def _prune(self, now: float):
+        """Esquece o quarto de clientes inativos há mais tempo"""
+        oldest = sorted(self._buckets.items(), key=lambda item: item[1][1])[:len(self._buckets) // 4]
+        for key, _ in oldest:
+            del self._buckets[key]
+            if not self._leases.get(key):
+                self._leases.pop(key, None)
+
+    def acquire(self, key: str, limit: int, lease_seconds: float, now: float) -> Tuple[Optional[str], int]:
+        """Reserva uma vaga; retorna (id da reserva ou None, vagas em uso)"""
+        with self._lock:
+            leases = self._leases.setdefault(key, {})
+            for lease_id in [lease_id for lease_id, expires in leases.items() if expires <= now]:
+                del leases[lease_id]
+            if len(leases) >= limit:
+                return None, len(leases)
+            lease_id = uuid.uuid4().hex
+            leases[lease_id] = now + lease_seconds
+            return lease_id, len(leases)
+
+    def release(self, key: str, lease_id: str):
+        with self._lock:
+            self._leases.get(key, {}).pop(lease_id, None)
+
+
+class SQLiteBackend:
+    """
+    Estado dos limites em um arquivo SQLite compartilhado.
+
+    Todos os processos (ex.: workers do gunicorn) que usam o mesmo arquivo
+    aplicam uma única cota por cliente. Cada operação é uma transação
+    ``BEGIN IMMEDIATE``; vagas de simultaneidade são reservas com validade,
+    de forma que um worker encerrado abruptamente não as prende para sempre.
+    """
+
+    def __init__(self, db_path: str, prune_every: int = 1000):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.prune_every = prune_every
+        self._takes = 0
+        # Autocommit: as transações são abertas explicitamente com BEGIN IMMEDIATE
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.Lock()
+        with self._transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS leases (key TEXT, lease_id TEXT PRIMARY KEY, expires REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS leases_key ON leases (key)')
+
+    @contextmanager
+    def _transaction(self):
+        """Leitura e escrita atômicas entre processos (trava de escrita desde o início)"""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def take(self, key: str, rate: float, burst: int, cost: int, now: float) -> Tuple[bool, float]:
+        with self._transaction() as db:
+            row = db.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            db.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (key, tokens, now))
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                self._prune(db, key.split(':', 1)[0], rate, burst, now)
+            return allowed, tokens
+
+    @staticmethod
+    def _prune(db, group: str, rate: float, burst: int, now: float):
+        """Esquece clientes do grupo cujo bucket já encheu de novo (equivale a não ter registro) e reservas vencidas"""
+        db.execute('DELETE FROM buckets WHERE key LIKE ? AND tokens + (? - updated) * ? >= ?',
+                   (f"{group}:%", now, rate, burst))
+        db.execute('DELETE FROM leases WHERE expires <= ?', (now,))
+
+    def acquire(self, key: str, limit: int, lease_seconds: float, now: float) -> Tuple[Optional[str], int]:
+        with self._transaction() as db:
+            db.execute('DELETE FROM leases WHERE key = ? AND expires <= ?', (key, now))
+            active = db.execute('SELECT COUNT(*) FROM leases WHERE key = ?', (key,)).fetchone()[0]
+            if active >= limit:
+                return None, active
+            lease_id = uuid.uuid4().hex
+            db.execute('INSERT INTO leases VALUES (?, ?, ?)', (key, lease_id, now + lease_seconds))
+            return lease_id, active + 1
+
+    def release(self, key: str, lease_id: str):
+        with self._transaction() as db:
+            db.execute('DELETE FROM leases WHERE lease_id = ?', (lease_id,))
+
+
+class Slot:
+    """Vaga de execução simultânea reservada para um cliente (``release`` é idempotente)"""
+
+    def __init__(self, backend, key: str, lease_id: Optional[str]):
+        self._backend = backend
+        self._key = key
+        self._lease_id = lease_id
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            lease_id, self._lease_id = self._lease_id, None
+        if lease_id:
+            self._backend.release(self._key, lease_id)
+
+
+class RateLimiter:
+    """
+    Limites por cliente e grupo de rotas (ex.: ``compile``, ``ai``).
+
+    ``check`` reserva primeiro uma vaga de simultaneidade (quando o grupo tem
+    ``max_concurrent``) e depois consome tokens do bucket; se qualquer um
+    falhar, nada fica reservado. A vaga retornada deve ser liberada quando a
+    operação termina.
+    """
+
+    def __init__(self, quotas: Dict[str, Quota], backend=None, lease_seconds: float = 600):
+        """
+        Inicializa o limitador.
+
+        Args:
+            quotas: Cota de cada grupo
+            backend: ``MemoryBackend`` (padrão) ou ``SQLiteBackend``
+            lease_seconds: Validade máxima de uma vaga de simultaneidade (s)
+        """
+        self.quotas = quotas
+        self.backend = backend or MemoryBackend()
+        self.lease_seconds = lease_seconds
+
+    def check(self, group: str, client: str, cost: int = 1) -> Tuple[Decision, Optional[Slot]]:
+        """Verifica (e consome) a cota do cliente no grupo; ``cost`` acima da rajada é sempre recusado"""
+        quota = self.quotas[group]
+        if cost > quota.burst:
+            # Nunca caberia no bucket: recusar em vez de cobrar só a rajada
+            return Decision(False, quota.burst, 0, 0.0, 0.0, quota.max_concurrent, 'cost'), None
+        key = f"{group}:{client}"
+        now = time.time()
+
+        slot = None
+        if quota.max_concurrent:
+            lease_id, active = self.backend.acquire(key, quota.max_concurrent, self.lease_seconds, now)
+            if lease_id is None:
+                return Decision(False, quota.burst, 0, 0.0, 1.0, quota.max_concurrent, 'concurrency'), None
+            slot = Slot(self.backend, key, lease_id)
+
+        allowed, tokens = self.backend.take(key, quota.rate, quota.burst, cost, now)
+        reset = (quota.burst - tokens) / quota.rate if quota.rate else 0.0
+        if not allowed:
+            if slot:
+                slot.release()
+            retry_after = (cost - tokens) / quota.rate if quota.rate else 60.0
+            return Decision(False, quota.burst, int(tokens), reset, retry_after,
+                            quota.max_concurrent, 'rate'), None
+
+        return Decision(True, quota.burst, int(tokens), reset, 0.0, quota.max_concurrent), slot
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotas administrativas (níveis de log em tempo de execução)
+"""
+
+import os
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from log_config import get_levels, set_levels
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/api/admin/logging', methods=['GET', 'PUT'])
+def admin_logging():
+    """Consultar/ajustar níveis de log em tempo de execução (requer LOG_ADMIN_TOKEN)."""
+    token = os.environ.get('LOG_ADMIN_TOKEN')
+    if not token:
+        return jsonify({'success': False, 'message': 'Endpoint desabilitado'}), 404
+    if request.headers.get('X-Admin-Token') != token:
+        return jsonify({'success': False, 'message': 'Não autorizado'}), 403
+
+    if request.method == 'PUT':
+        levels = request.get_json(silent=True) or {}
+        if not isinstance(levels, dict):
+            return jsonify({'success': False, 'message': 'Esperado objeto {logger: nível}'}), 400
+        try:
+            set_levels(levels)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        logger.info("Níveis de log alterados: %s", levels)
+
+    return jsonify({'success': True, 'levels': get_levels()})
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotas de geração de conteúdo com IA (Google Gemini)
+"""
+
+import json
+import time
+import logging
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from routes.limits import claim_slot, rate_limited
+from services import get_services
+
+logger = logging.getLogger(__name__)
+
+ai_bp = Blueprint('ai', __name__)
+
+@ai_bp.route('/api/ai/generate', methods=['POST'])
+@rate_limited('ai', error_key='error')
+def generate_ai_content():
+    """Gerar conteúdo usando IA Gemini."""
+    try:
+        data = request.get_json()
+        prompt = data.get('prompt', '')
+        content_type = data.get('content_type', 'text')
+        context = data.get('context', {})
+        
+        if not prompt:
+            return jsonify({'success': False, 'error': 'Prompt é obrigatório'}), 400
+        
+        logger.debug("🤖 Gerando conteúdo IA - Tipo: %s, Prompt: %.100s...", content_type, prompt)
+        
+        # Preparar prompt baseado no tipo de conteúdo
+        enhanced_prompt = prepare_prompt(prompt, content_type, context)
+        
+        # Fazer chamada para API do Gemini (prompts idênticos vêm do cache, exceto com "refresh")
+        response = call_gemini_api(enhanced_prompt, use_cache=not data.get('refresh'))
+        
+        if response['success']:
+            logger.debug("✅ Conteúdo gerado com sucesso: %d chars", len(response['content']))
+            return jsonify({
+                'success': True,
+                'content': response['content'],
+                'type': content_type,
+                'cached': response['cached']
+            })
+        elif 'retry_after' in response:
+            # Circuit breaker aberto: falha imediata, sem chamar a API
+            reply = jsonify({'success': False, 'error': response['error']})
+            reply.headers['Retry-After'] = str(max(1, int(response['retry_after'])))
+            return reply, 503
+        else:
+            logger.error(f"❌ Erro na API Gemini: {response['error']}")
+            return jsonify({'success': False, 'error': response['error']}), 500
+            
+    except Exception as e:
+        logger.error(f"❌ Erro na geração de IA: {str(e)}")
+        return jsonify({'success': False, 'error': f'Erro interno: {str(e)}'}), 500
+
+@ai_bp.route('/api/ai/generate/stream', methods=['POST'])
+@rate_limited('ai', error_key='error')
+def stream_ai_content():
+    """
+    Gera conteúdo com IA por streaming (Server-Sent Events).
+
+    Mesmo corpo de ``/api/ai/generate``. O texto é repassado à medida que o
+    Gemini o produz, em eventos ``data: {"text": "..."}``; o último evento é
+    ``event: done`` (com ``type`` e ``cached``) ou ``event: error``. Falhas
+    antes do primeiro trecho (ex.: circuito aberto) respondem JSON com o
+    status HTTP correspondente, como em ``/api/ai/generate``.
+    """
+    from ai_client import AIStreamError
+    
+    data = request.get_json() or {}
+    prompt = data.get('prompt', '')
+    content_type = data.get('content_type', 'text')
+    
+    if not prompt:
+        return jsonify({'success': False, 'error': 'Prompt é obrigatório'}), 400
+    
+    enhanced_prompt = prepare_prompt(prompt, content_type, data.get('context', {}))
+    provider = get_services().ai_provider
+    cached = None if data.get('refresh') else provider.get_cached(enhanced_prompt)
+    chunks = iter([cached]) if cached is not None else provider.stream(enhanced_prompt, use_cache=False)
+    
+    try:
+        # Só a abertura da conexão é feita aqui; o primeiro trecho define o status HTTP
+        first = next(chunks)
+    except AIStreamError as e:
+        reply = jsonify({'success': False, 'error': str(e)})
+        if e.retry_after is not None:
+            reply.headers['Retry-After'] = str(max(1, int(e.retry_after)))
+            return reply, 503
+        logger.error(f"❌ Erro na API Gemini: {str(e)}")
+        return reply, 502
+    
+    def events():
+        yield sse_event({'text': first})
+        try:
+            for chunk in chunks:
+                yield sse_event({'text': chunk})
+        except AIStreamError as e:
+            logger.error(f"❌ Streaming da IA interrompido: {str(e)}")
+            yield sse_event({'success': False, 'error': str(e)}, 'error')
+            return
+        yield sse_event({'success': True, 'type': content_type, 'cached': cached is not None}, 'done')
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx: não acumular a resposta
+    })
+
+def sse_event(data, event=None):
+    """Formata um evento Server-Sent Events"""
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def prepare_prompt(user_prompt, content_type, context):
+    """Preparar prompt otimizado baseado no tipo de conteúdo."""
+    
+    base_prompts = {
+        'title': f"""
+Gere um título acadêmico profissional e impactante para um artigo científico.
+Prompt do usuário: {user_prompt}
+Contexto: {context.get('abstract', '')}
+
+Requisitos:
+- Máximo 15 palavras
+- Linguagem acadêmica formal
+- Específico e descritivo
+- Em português
+
+Responda apenas com o título, sem aspas ou formatação extra.
+""",
+        
+        'abstract': f"""
+Gere um resumo/abstract acadêmico profissional.
+Prompt do usuário: {user_prompt}
+Título: {context.get('title', '')}
+
+Requisitos:
+- 150-250 palavras
+- Estrutura: contexto, objetivo, metodologia, resultados, conclusão
+- Linguagem acadêmica formal
+- Em português
+- Sem referências
+
+Responda apenas com o resumo, sem formatação extra.
+""",
+        
+        'keywords': f"""
+Gere palavras-chave acadêmicas relevantes.
+Prompt do usuário: {user_prompt}
+Título: {context.get('title', '')}
+Resumo: {context.get('abstract', '')}
+
+Requisitos:
+- 5-7 palavras-chave
+- Separadas por vírgula
+- Termos técnicos relevantes
+- Em português
+
+Responda apenas com as palavras-chave separadas por vírgula.
+""",
+        
+        'section': f"""
+Gere conteúdo acadêmico para uma seção de artigo científico.
+Prompt do usuário: {user_prompt}
+Contexto do artigo: {context.get('title', '')} - {context.get('abstract', '')}
+
+Requisitos:
+- 300-500 palavras
+- Linguagem acadêmica formal
+- Estrutura lógica com parágrafos
+- Conteúdo substantivo e técnico
+- Em português
+- Sem referências numeradas
+
+Responda apenas com o conteúdo da seção, sem título.
+"""
+    }
+    
+    return base_prompts.get(content_type, f"Gere conteúdo acadêmico sobre: {user_prompt}")
+
+def call_gemini_api(prompt, use_cache=True):
+    """Fazer chamada para API do Gemini (sessão compartilhada, com retentativas e cache)."""
+    try:
+        return get_services().ai_provider.generate(prompt, use_cache=use_cache)
+    except Exception as e:
+        return {'success': False, 'error': f'Erro inesperado: {str(e)}'}
+
+def batch_size():
+    """Cota consumida por um lote: um token por item"""
+    items = (request.get_json(silent=True) or {}).get('items')
+    return max(1, len(items)) if isinstance(items, list) else 1
+
+@ai_bp.route('/api/ai/generate/batch', methods=['POST'])
+@rate_limited('ai', cost=batch_size, error_key='error')
+def generate_ai_batch():
+    """
+    Gera vários campos do artigo de uma vez (ex.: título, resumo, palavras-chave e seções).
+
+    Corpo: ``{"context": {...}, "items": [{"content_type": "title", "prompt": "..."}, ...]}``.
+    Cada item pode ter seu próprio ``context``. As chamadas ao Gemini são
+    feitas em paralelo (no máximo ``AI_BATCH_FAN_OUT`` por vez), então o
+    tempo total fica próximo ao da geração mais lenta. Os resultados voltam
+    na ordem dos itens; a falha de um item não interrompe os demais.
+    """
+    from concurrent.futures import TimeoutError as BatchTimeoutError
+    
+    config = current_app.config
+    data = request.get_json() or {}
+    items = data.get('items')
+    context = data.get('context') or {}
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'error': 'Informe a lista "items"'}), 400
+    if len(items) > config['AI_BATCH_MAX_ITEMS']:
+        return jsonify({
+            'success': False,
+            'error': f"Máximo de {config['AI_BATCH_MAX_ITEMS']} itens por lote"
+        }), 413
+    if not isinstance(context, dict):
+        return jsonify({'success': False, 'error': '"context" deve ser um objeto'}), 400
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('prompt'):
+            return jsonify({'success': False, 'error': f'Prompt é obrigatório em todos os itens (item {index})'}), 400
+        if not isinstance(item.get('context', {}), dict):
+            return jsonify({'success': False, 'error': f'"context" do item {index} deve ser um objeto'}), 400
+
+    started = time.perf_counter()
+    prompts = [
+        prepare_prompt(item['prompt'], item.get('content_type', 'text'), {**context, **item.get('context', {})})
+        for item in items
+    ]
+    
+    try:
+        responses = get_services().ai_jobs.generate_many(
+            prompts,
+            use_cache=not data.get('refresh'),
+            fan_out=config['AI_BATCH_FAN_OUT'],
+            timeout=config['AI_BATCH_TIMEOUT']
+        )
+    except BatchTimeoutError:
+        return jsonify({'success': False, 'error': 'Tempo limite do lote excedido'}), 504
+    
+    results = []
+    for item, response in zip(items, responses):
+        response.pop('retry_after', None)
+        results.append({'type': item.get('content_type', 'text'), **response})
+    
+    succeeded = sum(1 for result in results if result['success'])
+    logger.debug("🤖 Lote de IA: %d/%d itens em %.2fs", succeeded, len(results), time.perf_counter() - started)
+    return jsonify({
+        'success': succeeded == len(results),
+        'total': len(results),
+        'succeeded': succeeded,
+        'seconds': round(time.perf_counter() - started, 3),
+        'results': results
+    })
+
+@ai_bp.route('/api/ai/jobs', methods=['POST'])
+@rate_limited('ai', error_key='error')
+def submit_ai_job():
+    """
+    Enfileira uma geração e retorna o id do job imediatamente.
+
+    As chamadas ao Gemini rodam em um event loop próprio, de forma que muitas
+    gerações podem estar em andamento sem ocupar as threads do servidor.
+    """
+    from ai_client import QueueFullError
+    
+    data = request.get_json() or {}
+    prompt = data.get('prompt', '')
+    content_type = data.get('content_type', 'text')
+    
+    if not prompt:
+        return jsonify({'success': False, 'error': 'Prompt é obrigatório'}), 400
+    
+    try:
+        enhanced_prompt = prepare_prompt(prompt, content_type, data.get('context', {}))
+        with claim_slot() as on_done:
+            job_id = get_services().ai_jobs.submit(enhanced_prompt, use_cache=not data.get('refresh'),
+                                                   on_done=on_done, type=content_type)
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/ai/jobs/{job_id}'
+    }), 202
+
+@ai_bp.route('/api/ai/jobs/<job_id>', methods=['GET'])
+def get_ai_job(job_id):
+    """Status e resultado de uma geração enfileirada."""
+    status = get_services().ai_jobs.get_status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    
+    if status['status'] == 'running':
+        status['success'] = True
+    return jsonify(status)
+
+@ai_bp.route('/api/ai/status', methods=['GET'])
+def ai_status():
+    """
+    Verificar status da IA.
+
+    Inclui um health check do provedor com a latência medida (refeito a cada
+    ``AI_HEALTH_TTL`` segundos; ``?check=0`` pula a verificação), o estado do
+    circuit breaker e as estatísticas do cache de respostas.
+    """
+    services = get_services()
+    provider = services.ai_provider
+    health = None
+    if request.args.get('check') != '0':
+        health = provider.check_health(max_age=current_app.config['AI_HEALTH_TTL'])
+    
+    return jsonify({
+        'success': True,
+        'ai_enabled': provider.configured and (health is None or health['ok']),
+        'provider': provider.display_name,
+        'version': provider.model,
+        'health': health,
+        'circuit': provider.circuit_state,
+        'cache': services.ai_cache.get_stats() if services.ai_cache else None
+    })
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotas de documentos: templates, prévia, geração, fila de jobs, lotes e downloads
+"""
+
+import uuid
+import logging
+
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
+
+from log_config import PREVIEW_LOGGER, LazyJSON
+from routes.limits import claim_slot, rate_limited
+from routes.projects import request_document
+from services import get_services
+
+logger = logging.getLogger(__name__)
+preview_logger = logging.getLogger(PREVIEW_LOGGER)
+
+documents_bp = Blueprint('documents', __name__)
+
+@documents_bp.route('/api/templates', methods=['GET'])
+def get_templates():
+    """Retorna lista de templates disponíveis."""
+    templates = {
+        'basic': {
+            'name': 'Básico',
+            'description': 'Template básico para artigos acadêmicos',
+            'features': ['Estrutura simples', 'Fácil personalização']
+        },
+        'ieee': {
+            'name': 'IEEE Conference',
+            'description': 'Template para conferências IEEE',
+            'features': ['Formato IEEE', 'Duas colunas', 'Bibliografia IEEE']
+        },
+        'acm': {
+            'name': 'ACM Article',
+            'description': 'Template para artigos ACM',
+            'features': ['Formato ACM', 'Layout profissional', 'Metadados completos']
+        },
+        'abnt': {
+            'name': 'ABNT (Brasil)',
+            'description': 'Template seguindo normas ABNT',
+            'features': ['Normas ABNT', 'Português brasileiro', 'Formatação acadêmica']
+        }
+    }
+    
+    # Templates adicionados em disco (TEMPLATES_DIR) aparecem sem metadados próprios
+    for name in get_services().template_registry.sources:
+        templates.setdefault(name, {
+            'name': name,
+            'description': 'Template personalizado',
+            'features': []
+        })
+    
+    return jsonify(templates)
+
+@documents_bp.route('/api/preview', methods=['POST'])
+def generate_preview():
+    """
+    Gera prévia do código LaTeX.
+    
+    Com ``response_mode: 'fragments'`` a resposta traz, em vez de
+    ``latex_code``, a ordem dos fragmentos do documento e o texto apenas dos
+    fragmentos cujo id não está em ``known_fragments`` (ids recebidos em
+    respostas anteriores). O cliente remonta o LaTeX concatenando os textos
+    na ordem indicada.
+    
+    Em vez do documento completo, o corpo pode trazer ``project_id`` de um
+    projeto salvo (``/api/save``) e o ``patch`` com o que mudou.
+    """
+    from latex_generator_v2 import LatexGeneratorV2
+    
+    data, project = request_document()
+    try:
+        preview_logger.debug("Dados recebidos para preview: %s", LazyJSON(data, indent=2))
+        
+        # Mesmo caminho de /api/preview/stream e da compilação (fragmentos reaproveitados entre requisições)
+        generator = LatexGeneratorV2.from_payload(data, fragment_cache=get_services().preview_cache)
+        sections_data = data.get('sections', [])
+        
+        debug_info = {
+            'sections_received': len(sections_data),
+            'sections_processed': len(generator.sections),
+            'authors_processed': len(generator.authors),
+            'figures_processed': len(generator.figures),
+            'tables_processed': len(generator.tables),
+            'references_processed': len(generator.references)
+        }
+        preview_logger.debug("Gerador configurado: template=%s, %s", generator.template_type, debug_info)
+        if len(generator.sections) < len(sections_data):
+            preview_logger.warning("%d seções ignoradas (título ou conteúdo vazio)",
+                                   len(sections_data) - len(generator.sections))
+        
+        # Prévia incremental: devolver só os fragmentos alterados
+        if request.json.get('response_mode') == 'fragments':
+            known_fragments = set(request.json.get('known_fragments', []))
+            fragments = generator.generate_fragments()
+            changed = {
+                frag_id: text for frag_id, text in fragments
+                if frag_id not in known_fragments
+            }
+            preview_logger.debug("Prévia incremental: %d/%d fragmentos alterados", len(changed), len(fragments))
+            
+            return jsonify({
+                'success': True,
+                'template': data.get('template', 'basic'),
+                'fragments': {
+                    'order': [frag_id for frag_id, _ in fragments],
+                    'changed': changed
+                },
+                'debug_info': debug_info,
+                'project': project
+            })
+        
+        # Gerar código LaTeX
+        preview_logger.debug("Gerando código LaTeX...")
+        latex_code = generator.generate_latex()
+        preview_logger.debug("Código LaTeX gerado: %d chars", len(latex_code))
+        
+        # Verificar se seções estão no LaTeX (busca no documento inteiro: só em DEBUG)
+        if preview_logger.isEnabledFor(logging.DEBUG):
+            for section in sections_data:
+                title = section.get('title', '')
+                if title and title in latex_code:
+                    preview_logger.debug("✓ Seção '%s' encontrada no LaTeX", title)
+                elif title:
+                    preview_logger.warning("✗ Seção '%s' NÃO encontrada no LaTeX", title)
+        
+        return jsonify({
+            'success': True,
+            'latex_code': latex_code,
+            'template': data.get('template', 'basic'),
+            'debug_info': debug_info,
+            'project': project
+        })
+        
+    except Exception as e:
+        preview_logger.error("Erro ao gerar prévia: %s", e, exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao gerar prévia: {str(e)}'
+        }), 500
+
+@documents_bp.route('/api/preview/stream', methods=['POST'])
+def stream_preview():
+    """
+    Prévia/download do LaTeX por streaming.
+    
+    O documento é enviado em blocos à medida que é formatado, sem montar a
+    string completa nem embuti-la em JSON. Use ``?download=1`` para receber
+    o arquivo como anexo.
+    """
+    from latex_generator_v2 import LatexGeneratorV2, STREAM_CHUNK_SIZE
+    
+    data, _ = request_document()
+    try:
+        generator = LatexGeneratorV2.from_payload(data, fragment_cache=get_services().preview_cache)
+    except Exception as e:
+        preview_logger.error("Erro ao preparar prévia: %s", e, exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao gerar prévia: {str(e)}'
+        }), 500
+    
+    headers = {}
+    if request.args.get('download'):
+        headers['Content-Disposition'] = 'attachment; filename=article.tex'
+    
+    return Response(
+        stream_with_context(generator.iter_latex(chunk_size=STREAM_CHUNK_SIZE)),
+        mimetype='application/x-tex',
+        headers=headers
+    )
+
+@documents_bp.route('/api/generate', methods=['POST'])
+@rate_limited('compile')
+def generate_article():
+    """
+    Gera o artigo completo (LaTeX + PDF).
+
+    A compilação roda no pool de processos da fila (``COMPILE_WORKERS``), não
+    na thread da requisição: as threads do servidor web ficam livres para as
+    rotas leves (prévia, templates) e a fila cheia responde 429. Como em
+    ``/api/preview``, aceita ``project_id`` + ``patch`` no lugar do documento.
+    """
+    from concurrent.futures import TimeoutError as CompileTimeoutError
+    from compile_jobs import QueueFullError
+    
+    data, project = request_document()
+    try:
+        logger.debug("Dados recebidos para geração: %s", LazyJSON(data, indent=2))
+        
+        # Gerar nome único para o documento
+        doc_id = str(uuid.uuid4())[:8]
+        output_name = f"article_{doc_id}"
+        
+        # Compilar para PDF (consulta o cache de builds antes do pdflatex)
+        queue = get_services().compile_queue
+        with claim_slot() as on_done:
+            job_id = queue.submit(data, output_name, on_done=on_done)
+        result = queue.wait(job_id, timeout=current_app.config['COMPILE_TIMEOUT'])
+        
+        if result['success']:
+            pdf_filename = result['pdf_filename']
+            latex_filename = result['latex_filename']
+            origin = 'obtido do cache' if result['cached'] else 'gerado com sucesso'
+            
+            return jsonify({
+                'success': True,
+                'message': f"PDF {origin}! Total: {result['sections_count']} seções processadas",
+                'document_id': doc_id,
+                'cached': result['cached'],
+                'passes': result['passes'],
+                'pdf_filename': pdf_filename,
+                'latex_filename': latex_filename,
+                'download_pdf_url': f'/api/download/{pdf_filename}',
+                'download_latex_url': f'/api/download/{latex_filename}',
+                'project': project
+            })
+        else:
+            # Se falhar na compilação PDF, retornar pelo menos o LaTeX
+            return jsonify({
+                'success': False,
+                'message': f"Erro na compilação PDF: {result['message']}. Código LaTeX gerado.",
+                'latex_code': result['latex_code']
+            }), 500
+        
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'message': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except CompileTimeoutError:
+        # O job continua na fila; o resultado pode ser consultado em /api/jobs/<id>
+        return jsonify({
+            'success': False,
+            'message': 'Tempo limite de compilação excedido',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 504
+    except Exception as e:
+        logger.error(f"Erro ao gerar artigo: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao gerar artigo: {str(e)}'
+        }), 500
+
+# ==========================================
+# FILA ASSÍNCRONA DE COMPILAÇÃO
+# ==========================================
+
+@documents_bp.route('/api/jobs', methods=['POST'])
+@rate_limited('compile')
+def submit_compile_job():
+    """Enfileira a geração do artigo e retorna o id do job imediatamente (aceita ``project_id`` + ``patch``)."""
+    from compile_jobs import QueueFullError
+    
+    data, project = request_document()
+    try:
+        with claim_slot() as on_done:
+            job_id = get_services().compile_queue.submit(data, on_done=on_done)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}',
+            'result_url': f'/api/jobs/{job_id}/result',
+            'project': project
+        }), 202
+        
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'message': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar artigo: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Erro ao enfileirar artigo: {str(e)}'
+        }), 500
+
+@documents_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_compile_job(job_id):
+    """Status de um job de compilação (queued, running, completed ou failed)."""
+    status = get_services().compile_queue.get_status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Job não encontrado'}), 404
+    
+    result = status.get('result')
+    if result and 'manifest' in result:
+        # Lote: zip completo e PDF de cada documento gerado
+        status['download_zip_url'] = f"/api/download/{result['zip_filename']}"
+        for document in result['manifest']['documents']:
+            if document['success']:
+                document['download_pdf_url'] = f"/api/download/{document['pdf_filename']}"
+    elif result and result['success']:
+        status['download_pdf_url'] = f"/api/download/{result['pdf_filename']}"
+        status['download_latex_url'] = f"/api/download/{result['latex_filename']}"
+    
+    status['success'] = True
+    return jsonify(status)
+
+@documents_bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_compile_job_result(job_id):
+    """Entrega o PDF (ou o .tex com ?format=tex) de um job concluído; de um lote, o zip."""
+    status = get_services().compile_queue.get_status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'message': 'Job não encontrado'}), 404
+    
+    if status['status'] in ('queued', 'running'):
+        return jsonify({'success': False, 'message': 'Job ainda em processamento', 'status': status['status']}), 409
+    
+    result = status.get('result')
+    if not result or not result['success']:
+        return jsonify({
+            'success': False,
+            'message': status.get('message', 'Falha na compilação'),
+            'latex_code': (result or {}).get('latex_code')
+        }), 500
+    
+    if 'manifest' in result:
+        filename = result['zip_filename']
+    else:
+        filename = result['latex_filename'] if request.args.get('format') == 'tex' else result['pdf_filename']
+    return send_file(current_app.config['OUTPUT_FOLDER'] / filename, as_attachment=True)
+
+# ==========================================
+# GERAÇÃO EM LOTE
+# ==========================================
+
+@documents_bp.route('/api/batch', methods=['POST'])
+@rate_limited('compile')
+def generate_batch():
+    """
+    Enfileira a geração de vários artigos.
+
+    Aceita uma lista JSON, ``{"documents": [...]}`` ou JSONL
+    (``application/x-ndjson``). O lote roda no pool da fila de compilação
+    (``COMPILE_WORKERS``), com até ``BATCH_WORKERS`` documentos em andamento,
+    e responde 202 com o id do job; ``/api/jobs/<id>`` traz o manifesto
+    (tempo e resultado por documento) e a URL do zip com os PDFs/.tex e o
+    ``manifest.json``. Falhas individuais não interrompem o lote.
+    """
+    from batch import load_documents
+    from compile_jobs import QueueFullError
+    
+    max_documents = current_app.config['BATCH_MAX_DOCUMENTS']
+    try:
+        documents = load_documents(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Lote inválido: {str(e)}'}), 400
+
+    if not documents:
+        return jsonify({'success': False, 'message': 'Nenhum documento enviado'}), 400
+    if len(documents) > max_documents:
+        return jsonify({
+            'success': False,
+            'message': f'Lote muito grande (máximo {max_documents} documentos)'
+        }), 413
+
+    try:
+        with claim_slot() as on_done:
+            job_id = get_services().compile_queue.submit_batch(
+                documents, max_in_flight=current_app.config['BATCH_WORKERS'], on_done=on_done
+            )
+        logger.info("Lote %s: %d documentos enfileirados", job_id, len(documents))
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'total': len(documents),
+            'status_url': f'/api/jobs/{job_id}',
+            'result_url': f'/api/jobs/{job_id}/result'
+        }), 202
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'message': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar lote: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Erro ao enfileirar lote: {str(e)}'}), 500
+
+@documents_bp.route('/api/download/<filename>')
+def download_file(filename):
+    """Download de arquivos gerados."""
+    try:
+        file_path = current_app.config['OUTPUT_FOLDER'] / filename
+        if file_path.exists():
+            return send_file(file_path, as_attachment=True)
+        else:
+            return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro no download: {str(e)}'}), 500
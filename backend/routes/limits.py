@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limites de uso nas rotas caras (compilação e IA)
+Decorator que aplica a cota do cliente e informa o saldo nos headers X-RateLimit-*
+"""
+
+import math
+import functools
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from flask import current_app, g, jsonify, make_response, request
+
+from services import get_services
+
+
+def client_id() -> str:
+    """
+    Identifica o cliente pelo IP.
+
+    Com ``RATE_LIMIT_TRUST_PROXY`` = N (proxies confiáveis à frente do
+    servidor), usa a N-ésima entrada do ``X-Forwarded-For`` a partir da
+    direita, a adicionada pelo proxy mais externo (como o ``ProxyFix`` do
+    werkzeug); as entradas à esquerda vêm do próprio cliente.
+    """
+    hops = current_app.config['RATE_LIMIT_TRUST_PROXY']
+    if hops:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist('X-Forwarded-For')
+            for address in header.split(',') if address.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr or 'unknown'
+
+
+@contextmanager
+def claim_slot():
+    """
+    Transfere a vaga de simultaneidade da requisição para o job criado no bloco::
+
+        with claim_slot() as on_done:
+            job_id = queue.submit(data, on_done=on_done)
+
+    A vaga passa a ser liberada pelo ``on_done`` do job, mesmo que a resposta
+    seja um erro (ex.: 504 com o job ainda em execução). Se o bloco levantar
+    exceção (ex.: fila cheia), o job não existe e a vaga volta à requisição.
+    """
+    slot = g.get('rate_limit_slot')
+    g.rate_limit_slot_claimed = slot is not None
+    try:
+        yield slot.release if slot else None
+    except BaseException:
+        g.rate_limit_slot_claimed = False
+        raise
+
+
+def rate_limited(group: str, cost: Optional[Callable[[], int]] = None, error_key: str = 'message'):
+    """
+    Aplica a cota ``group`` (ver ``RATE_LIMIT_*``) à rota.
+
+    Acima da cota responde 429 com ``Retry-After``. A vaga de simultaneidade
+    fica ocupada até o fim da resposta (inclusive streaming) ou, se a rota
+    chamar ``claim_slot``, até o fim do job.
+
+    Args:
+        group: Grupo de cota (``compile`` ou ``ai``)
+        cost: Tokens consumidos pela requisição (padrão 1); acima da rajada, 413
+        error_key: Campo da mensagem de erro no JSON (como nas demais respostas da rota)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_services().rate_limiter
+            if limiter is None:
+                return view(*args, **kwargs)
+
+            decision, slot = limiter.check(group, client_id(), cost() if cost else 1)
+            if decision.reason == 'cost':
+                response = jsonify({
+                    'success': False,
+                    error_key: f'Requisição maior que a cota permite de uma vez (máximo {decision.limit})'
+                })
+                response.status_code = 413
+                return add_limit_headers(response, decision)
+            if not decision.allowed:
+                reason = ('Muitas operações simultâneas' if decision.reason == 'concurrency'
+                          else 'Limite de requisições excedido')
+                response = jsonify({'success': False, error_key: f'{reason}; tente novamente em instantes'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+                return add_limit_headers(response, decision)
+
+            g.rate_limit_slot = slot
+            g.rate_limit_slot_claimed = False
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                if slot and not g.rate_limit_slot_claimed:
+                    slot.release()
+                raise
+
+            if slot and not g.rate_limit_slot_claimed:
+                if response.is_streamed:
+                    response.call_on_close(slot.release)
+                else:
+                    slot.release()
+            return add_limit_headers(response, decision)
+        return wrapper
+    return decorator
+
+
+def add_limit_headers(response, decision):
+    """Saldo da cota: rajada, tokens restantes e segundos até o bucket encher"""
+    response.headers['X-RateLimit-Limit'] = str(decision.limit)
+    response.headers['X-RateLimit-Remaining'] = str(decision.remaining)
+    response.headers['X-RateLimit-Reset'] = str(math.ceil(decision.reset))
+    if decision.concurrent_limit:
+        response.headers['X-RateLimit-Concurrency'] = str(decision.concurrent_limit)
+    return response
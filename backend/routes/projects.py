@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotas de projetos salvos: o documento é enviado uma vez e depois alterado por patches
+"""
+
+import json
+import logging
+
+from flask import Blueprint, g, jsonify, request
+
+from models.project import InvalidPatchError, ProjectNotFoundError, VersionConflictError
+from services import get_services
+
+logger = logging.getLogger(__name__)
+
+projects_bp = Blueprint('projects', __name__)
+
+@projects_bp.route('/api/save', methods=['POST'])
+def save_project():
+    """
+    Salva um projeto.
+
+    Sem ``project_id``, o corpo é o documento completo (mesmo formato de
+    ``/api/preview``) e um projeto novo é criado. Com ``project_id``, aplica
+    ``patch`` ao projeto salvo (ver ``models.project.apply_patch``); com
+    ``base_version``, responde 409 se o projeto mudou desde essa versão.
+
+    A resposta traz ``project_id``, ``version`` e ``item_ids`` (ids das
+    seções, figuras, tabelas, autores e referências, na ordem), usados nos
+    patches seguintes.
+    """
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Documento inválido'}), 400
+
+    store = get_services().project_store
+    if data.get('project_id'):
+        project = store.update(data['project_id'], data.get('patch') or {}, data.get('base_version'))
+        del project['document']
+        return jsonify({'success': True, **project})
+
+    project = store.create(data)
+    logger.debug("Projeto %s criado", project['project_id'])
+    return jsonify({'success': True, **project}), 201
+
+@projects_bp.route('/api/load/<project_id>', methods=['GET'])
+def load_project(project_id):
+    """Documento completo de um projeto salvo, com a versão atual."""
+    return jsonify({'success': True, **get_services().project_store.load(project_id)})
+
+def request_document():
+    """
+    Documento de uma requisição de prévia ou geração.
+
+    Se o corpo tiver ``project_id``, o documento é o projeto salvo com o
+    ``patch`` do corpo aplicado (e gravado, para que as próximas requisições
+    partam dele); caso contrário, é o próprio corpo.
+
+    O patch fica gravado mesmo que a prévia ou a compilação falhe depois;
+    por isso toda resposta da requisição informa a nova versão (ver
+    ``add_project_version``), e o cliente não repete um patch já aplicado.
+
+    Returns:
+        (documento, dados do projeto ou None): o segundo item tem
+        ``project_id``, ``version`` e ``item_ids``
+    """
+    data = request.json
+    if not isinstance(data, dict) or not data.get('project_id'):
+        return data, None
+
+    project = get_services().project_store.update(
+        data['project_id'], data.get('patch') or {}, data.get('base_version')
+    )
+    document = project.pop('document')
+    g.project = project
+    return document, project
+
+@projects_bp.after_app_request
+def add_project_version(response):
+    """
+    Versão do projeto em todas as respostas de requisições com patch.
+
+    Headers ``X-Project-Id``/``X-Project-Version`` (também em streaming) e,
+    em respostas JSON que ainda não o trazem (ex.: 429, 500, 504), o campo
+    ``project``.
+    """
+    project = g.get('project')
+    if project is None:
+        return response
+
+    response.headers['X-Project-Id'] = project['project_id']
+    response.headers['X-Project-Version'] = str(project['version'])
+    if response.is_json and not response.is_streamed:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict) and 'project' not in body:
+            body['project'] = project
+            response.set_data(json.dumps(body, ensure_ascii=False))
+    return response
+
+@projects_bp.app_errorhandler(ProjectNotFoundError)
+def project_not_found(e):
+    return jsonify({'success': False, 'message': str(e)}), 404
+
+@projects_bp.app_errorhandler(VersionConflictError)
+def project_version_conflict(e):
+    return jsonify({'success': False, 'message': str(e), 'version': e.current_version}), 409
+
+@projects_bp.app_errorhandler(InvalidPatchError)
+def invalid_patch(e):
+    return jsonify({'success': False, 'message': f'Patch inválido: {str(e)}'}), 400
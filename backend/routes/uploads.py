@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rotas de upload de imagens/figuras e miniaturas
+"""
+
+import os
+import logging
+
+from flask import Blueprint, current_app, jsonify, request, send_file
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from figure_store import content_digest, file_digest
+from image_pipeline import THUMBNAIL_SIZES
+from services import get_services
+
+logger = logging.getLogger(__name__)
+
+uploads_bp = Blueprint('uploads', __name__)
+
+# Uploads endereçados por conteúdo podem ficar em cache no navegador indefinidamente
+IMAGE_MAX_AGE = 365 * 24 * 3600
+
+
+def allowed_file(filename):
+    """Verificar se o arquivo tem extensão permitida."""
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+@uploads_bp.route('/api/upload', methods=['POST'])
+def upload_file():
+    """Upload de arquivos (imagens, figuras)."""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'message': 'Nenhum arquivo enviado'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'success': False, 'message': 'Nenhum arquivo selecionado'}), 400
+        
+        if file and allowed_file(file.filename):
+            # Salvar no store endereçado por conteúdo (arquivos repetidos são gravados uma vez)
+            filename = secure_filename(file.filename)
+            services = get_services()
+            stored = services.figure_store.save_stream(file.stream, filename)
+            services.figure_preprocessor.submit(stored.path)
+            
+            return jsonify({
+                'success': True,
+                'message': 'Arquivo enviado com sucesso',
+                'file_id': stored.filename,
+                'file_path': str(stored.path),
+                'original_name': filename,
+                'sha256': stored.digest,
+                'deduplicated': not stored.created
+            })
+        
+        return jsonify({'success': False, 'message': 'Tipo de arquivo não permitido'}), 400
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro no upload: {str(e)}'}), 500
+
+@uploads_bp.route('/api/upload/image', methods=['POST'])
+def upload_image():
+    """Upload de imagem para uso no artigo."""
+    try:
+        if 'image' not in request.files:
+            return jsonify({'success': False, 'message': 'Nenhum arquivo enviado'}), 400
+        
+        file = request.files['image']
+        
+        if file.filename == '':
+            return jsonify({'success': False, 'message': 'Nenhum arquivo selecionado'}), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({'success': False, 'message': 'Tipo de arquivo não permitido'}), 400
+        
+        # Salvar arquivo (nome derivado do hash do conteúdo)
+        services = get_services()
+        stored = services.figure_store.save_stream(file.stream, secure_filename(file.filename))
+        services.figure_preprocessor.submit(stored.path)
+        filename = stored.filename
+        file_path = str(stored.path)
+        
+        logger.debug("✅ Imagem salva: %s", file_path)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Imagem carregada com sucesso',
+            'filename': filename,
+            'path': file_path,
+            'url': f'/api/uploads/{filename}',
+            'thumbnail_urls': {
+                size: f'/api/thumbnails/{size}/{filename}?v={services.figure_preprocessor.thumbnail_tag(size)}'
+                for size in THUMBNAIL_SIZES
+            },
+            'sha256': stored.digest,
+            'deduplicated': not stored.created
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Erro no upload: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erro no upload: {str(e)}'}), 500
+
+def send_cached_image(path, etag, immutable):
+    """
+    Enviar imagem com ETag forte e tratamento de If-None-Match (304).
+
+    Nomes endereçados por conteúdo (``<sha256>.<ext>``) nunca mudam de
+    conteúdo e são marcados como ``immutable``; os demais são revalidados
+    pelo navegador a cada uso.
+    """
+    response = send_file(path, etag=etag, conditional=True, max_age=IMAGE_MAX_AGE if immutable else None)
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+@uploads_bp.route('/api/uploads/<filename>')
+def uploaded_file(filename):
+    """Servir arquivos de upload."""
+    try:
+        path = safe_join(str(current_app.config['UPLOAD_FOLDER']), filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+        return send_cached_image(path, file_digest(path), content_digest(path) is not None)
+    except Exception as e:
+        logger.error(f"❌ Erro ao servir arquivo: {str(e)}")
+        return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+
+@uploads_bp.route('/api/thumbnails/<size>/<filename>')
+def uploaded_thumbnail(size, filename):
+    """
+    Miniatura de um upload (small/medium/large), gerada na primeira requisição.
+
+    Só é ``immutable`` com ``?v=`` igual à versão atual das miniaturas (como
+    nas URLs de ``/api/upload/image``); sem ela, o navegador revalida pelo
+    ETag, que muda junto com a versão do pipeline e os parâmetros.
+    """
+    if size not in THUMBNAIL_SIZES:
+        return jsonify({
+            'success': False,
+            'message': f"Tamanho inválido. Use: {', '.join(THUMBNAIL_SIZES)}"
+        }), 400
+    try:
+        path = safe_join(str(current_app.config['UPLOAD_FOLDER']), filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+
+        digest = file_digest(path)
+        preprocessor = get_services().figure_preprocessor
+        tag = preprocessor.thumbnail_tag(size)
+        immutable = content_digest(path) is not None
+        thumb = preprocessor.thumbnail(path, size)
+        if thumb is None:
+            # Sem Pillow ou formato vetorial: o original faz as vezes de miniatura
+            return send_cached_image(path, digest, immutable)
+        return send_cached_image(thumb, f"{digest}-{tag}", immutable and request.args.get('v') == tag)
+    except Exception as e:
+        logger.error(f"❌ Erro ao gerar miniatura: {str(e)}")
+        return jsonify({'success': False, 'message': 'Erro ao gerar miniatura'}), 500
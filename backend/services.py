@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Subsistemas do servidor criados sob demanda
+Caches, fila de compilação, registro de templates, store de figuras, projetos salvos, provedor de IA e limites de uso só são importados no primeiro uso
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+from flask import current_app
+
+
+class Services:
+    """
+    Contêiner dos subsistemas de uma instância do app.
+
+    Cada propriedade importa o módulo correspondente e cria a instância no
+    primeiro acesso, de forma que a inicialização do servidor não paga pelo
+    compilador, pela fila de processos ou pelo Pillow antes do primeiro uso.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()  # fábricas podem depender de outros subsistemas
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    @property
+    def build_cache(self):
+        """Cache de compilação (PDF/.tex por hash do documento)"""
+        def factory():
+            from build_cache import BuildCache
+            return BuildCache(
+                self.config['CACHE_FOLDER'],
+                max_size_bytes=self.config['CACHE_MAX_SIZE_MB'] * 1024 * 1024,
+                max_age_seconds=self.config['CACHE_TIMEOUT']
+            )
+        return self._get('build_cache', factory)
+
+    @property
+    def compile_queue(self):
+        """Fila de compilação em processos separados (backpressure via HTTP 429)"""
+        def factory():
+            from compile_jobs import CompileJobQueue
+            return CompileJobQueue(
+                self.config['OUTPUT_FOLDER'],
+                self.build_cache,
+                cache_dir=self.config['CACHE_FOLDER'],
+                max_workers=self.config['COMPILE_WORKERS'],
+                max_pending=self.config['COMPILE_QUEUE_MAX']
+            )
+        return self._get('compile_queue', factory)
+
+    @property
+    def preview_cache(self):
+        """Cache de fragmentos formatados da prévia (autores, seções, figuras, referências)"""
+        def factory():
+            from fragment_cache import FragmentCache
+            return FragmentCache(max_entries=self.config['PREVIEW_CACHE_ENTRIES'])
+        return self._get('preview_cache', factory)
+
+    @property
+    def template_registry(self):
+        """Templates carregados e analisados uma única vez"""
+        def factory():
+            from template_registry import get_template_registry
+            return get_template_registry()
+        return self._get('template_registry', factory)
+
+    @property
+    def figure_store(self):
+        """Uploads deduplicados: <sha256>.<ext> dentro de UPLOAD_FOLDER"""
+        def factory():
+            from figure_store import FigureStore
+            return FigureStore(self.config['UPLOAD_FOLDER'])
+        return self._get('figure_store', factory)
+
+    @property
+    def figure_preprocessor(self):
+        """Derivados das figuras (convertidos/reduzidos), gerados em segundo plano após o upload"""
+        def factory():
+            from image_pipeline import get_preprocessor
+            return get_preprocessor(str(self.config['CACHE_FOLDER'] / 'figures'))
+        return self._get('figure_preprocessor', factory)
+
+    @property
+    def ai_provider(self):
+        """Provedor de IA (AI_PROVIDER: gemini ou local), com cache de respostas"""
+        def factory():
+            from ai_client import create_provider
+            return create_provider(self.config['AI_PROVIDER'], self.config, cache=self.ai_cache)
+        return self._get('ai_provider', factory)
+
+    @property
+    def ai_cache(self):
+        """Respostas da IA por prompt final (memória + SQLite opcional); None se desativado"""
+        def factory():
+            from ai_cache import AIResponseCache
+            if not self.config['AI_CACHE_ENTRIES']:
+                return None
+            return AIResponseCache(
+                max_entries=self.config['AI_CACHE_ENTRIES'],
+                ttl=self.config['AI_CACHE_TTL'],
+                db_path=self.config['AI_CACHE_DB'] or None
+            )
+        return self._get('ai_cache', factory)
+
+    @property
+    def ai_jobs(self):
+        """Gerações de IA em segundo plano (event loop próprio)"""
+        def factory():
+            from ai_client import AIJobQueue
+            return AIJobQueue(
+                self.ai_provider,
+                max_in_flight=self.config['AI_MAX_IN_FLIGHT'],
+                max_pending=self.config['AI_QUEUE_MAX']
+            )
+        return self._get('ai_jobs', factory)
+
+    @property
+    def project_store(self):
+        """Projetos salvos (/api/save, /api/load) em database/app.db"""
+        def factory():
+            from models.project import ProjectStore
+            return ProjectStore(self.config['PROJECT_DB'], cache_entries=self.config['PROJECT_CACHE_ENTRIES'])
+        return self._get('project_store', factory)
+
+    @property
+    def rate_limiter(self):
+        """Cotas por cliente nas rotas de compilação e IA (memória ou SQLite); None se desativado"""
+        def factory():
+            from rate_limit import MemoryBackend, RateLimiter, SQLiteBackend, parse_quota
+            if not self.config['RATE_LIMIT_ENABLED']:
+                return None
+            if self.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+                backend = SQLiteBackend(self.config['RATE_LIMIT_DB']
+                                        or str(self.config['CACHE_FOLDER'] / 'rate_limit.sqlite3'))
+            else:
+                backend = MemoryBackend()
+            return RateLimiter(
+                {'compile': parse_quota(self.config['RATE_LIMIT_COMPILE']),
+                 'ai': parse_quota(self.config['RATE_LIMIT_AI'])},
+                backend=backend,
+                lease_seconds=self.config['RATE_LIMIT_LEASE']
+            )
+        return self._get('rate_limiter', factory)
+
+    def prepare_latex_formats(self):
+        """Pré-compila o preâmbulo de cada template (arquivos .fmt em cache/formats)"""
+        from latex_compiler import get_compiler
+        return get_compiler(str(self.config['CACHE_FOLDER'] / 'formats')).prepare_formats(
+            self.template_registry.sources
+        )
+
+
+def get_services() -> Services:
+    """Subsistemas do app da requisição atual"""
+    return current_app.extensions['latex_generator']
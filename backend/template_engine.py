@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de templates LaTeX
+Templates são analisados uma vez em segmentos literais/placeholders e renderizados em uma passada
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Placeholders dos templates: {{TITLE}}, {{SECTIONS}}, ...
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Z]+)\}\}')
+
+
+class CompiledTemplate:
+    """
+    Template pré-processado.
+
+    ``segments`` é uma tupla de pares ``(is_placeholder, texto)``: literais
+    são copiados como estão e placeholders são trocados pelo valor
+    correspondente. Como a substituição acontece em uma única passada, o
+    conteúdo inserido (ex.: uma seção contendo ``{{FIGURES}}``) nunca é
+    reinterpretado como placeholder.
+    """
+
+    __slots__ = ('source', 'segments', 'placeholders')
+
+    def __init__(self, source: str):
+        self.source = source
+
+        segments = []
+        for i, part in enumerate(PLACEHOLDER_PATTERN.split(source)):
+            if i % 2 == 0:
+                if part:
+                    segments.append((False, part))
+            else:
+                segments.append((True, part))
+
+        self.segments: Tuple[Tuple[bool, str], ...] = tuple(segments)
+        self.placeholders = frozenset(text for is_placeholder, text in self.segments if is_placeholder)
+
+    def iter_parts(self, values: Dict[str, Iterable[str]]) -> Iterator[str]:
+        """
+        Percorre o documento parte a parte.
+
+        Args:
+            values: Para cada placeholder, a sequência de textos que o substitui.
+                Placeholders sem valor são mantidos literalmente.
+        """
+        for is_placeholder, text in self.segments:
+            if not is_placeholder:
+                yield text
+            elif text in values:
+                yield from values[text]
+            else:
+                yield '{{' + text + '}}'
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Renderiza o template com um texto por placeholder"""
+        parts: List[str] = []
+        for is_placeholder, text in self.segments:
+            if not is_placeholder:
+                parts.append(text)
+            else:
+                parts.append(values.get(text, '{{' + text + '}}'))
+        return ''.join(parts)
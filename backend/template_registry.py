@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro compartilhado de templates LaTeX
+Templates .tex carregados e compilados uma vez por processo, com recarga quando o mtime muda
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from template_engine import CompiledTemplate
+
+# Templates embutidos (basic, ieee, acm, abnt)
+BUILTIN_TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+
+class TemplateEntry(NamedTuple):
+    """Template carregado do disco"""
+    name: str
+    source: str
+    compiled: CompiledTemplate
+    path: Path
+    mtime_ns: int
+
+
+class TemplateRegistry:
+    """
+    Registro imutável de templates, compartilhado entre requisições.
+
+    Cada arquivo ``<nome>.tex`` dos diretórios registrados vira o template
+    ``<nome>`` (diretórios adicionados depois têm precedência). Os
+    snapshots expostos são ``MappingProxyType`` substituídos atomicamente a
+    cada recarga, então leitores nunca precisam de lock. A verificação de
+    mtime acontece no máximo uma vez a cada ``reload_interval`` segundos.
+    """
+
+    def __init__(self, directories: List[Path], reload_interval: float = 2.0):
+        """
+        Inicializa o registro.
+
+        Args:
+            directories: Diretórios com arquivos .tex
+            reload_interval: Intervalo mínimo (s) entre verificações de mtime;
+                use 0 para verificar a cada acesso e None (ou negativo) para
+                nunca recarregar
+        """
+        self.directories = [Path(directory) for directory in directories]
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._entries: Mapping[str, TemplateEntry] = MappingProxyType({})
+        self._sources: Mapping[str, str] = MappingProxyType({})
+        self._load()
+
+    def add_directory(self, directory: str):
+        """Registra outro diretório de templates e recarrega"""
+        with self._lock:
+            self.directories.append(Path(directory))
+        self._load()
+
+    def _scan(self) -> Dict[str, Tuple[Path, int]]:
+        """Lista os arquivos .tex e seus mtimes"""
+        found = {}
+        for directory in self.directories:
+            if not directory.is_dir():
+                continue
+            for path in directory.glob('*.tex'):
+                try:
+                    found[path.stem] = (path, path.stat().st_mtime_ns)
+                except OSError:
+                    continue
+        return found
+
+    def _load(self):
+        """(Re)carrega apenas os templates novos ou alterados"""
+        with self._lock:
+            current = self._entries
+            entries = {}
+
+            for name, (path, mtime_ns) in self._scan().items():
+                entry = current.get(name)
+                if entry and entry.path == path and entry.mtime_ns == mtime_ns:
+                    entries[name] = entry
+                    continue
+                try:
+                    source = path.read_text(encoding='utf-8')
+                except OSError:
+                    if entry:
+                        entries[name] = entry
+                    continue
+                entries[name] = TemplateEntry(name, source, CompiledTemplate(source), path, mtime_ns)
+
+            self._entries = MappingProxyType(entries)
+            self._sources = MappingProxyType({name: entry.source for name, entry in entries.items()})
+            self._last_check = time.monotonic()
+
+    def _maybe_reload(self):
+        """Recarrega se o intervalo de verificação já passou"""
+        if self.reload_interval is None or self.reload_interval < 0:
+            return
+        if time.monotonic() - self._last_check >= self.reload_interval:
+            self._load()
+
+    @property
+    def entries(self) -> Mapping[str, TemplateEntry]:
+        """Snapshot imutável nome -> TemplateEntry"""
+        self._maybe_reload()
+        return self._entries
+
+    @property
+    def sources(self) -> Mapping[str, str]:
+        """Snapshot imutável nome -> texto do template"""
+        self._maybe_reload()
+        return self._sources
+
+    def get(self, name: str) -> Optional[TemplateEntry]:
+        """Template pelo nome (ou None)"""
+        return self.entries.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """
+    Registro do processo: templates embutidos mais os de ``TEMPLATES_DIR``
+    (lista separada por ``os.pathsep``).
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                directories = [BUILTIN_TEMPLATES_DIR]
+                extra = os.environ.get('TEMPLATES_DIR', '')
+                directories.extend(Path(d) for d in extra.split(os.pathsep) if d)
+                _registry = TemplateRegistry(
+                    directories,
+                    reload_interval=float(os.environ.get('TEMPLATES_RELOAD_INTERVAL', '2'))
+                )
+    return _registry